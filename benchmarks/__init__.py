@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+""" Benchmarks for the xlsx reader hot paths, see benchmarks.run """
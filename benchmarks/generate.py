@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+""" Synthetic xlsx workbook generator for the benchmarks.
+Writes workbooks with only the stdlib zipfile module and plain xml text, so
+the reader can be measured on any shape of data without fixtures.
+
+"""
+
+from __future__ import unicode_literals
+
+import random
+import zipfile
+from xml.sax.saxutils import escape
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">\
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>\
+<Default Extension="xml" ContentType="application/xml"/>\
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>\
+<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>\
+<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>\
+<Override PartName="/docProps/core.xml" ContentType="application/vnd.openxmlformats-package.core-properties+xml"/>\
+%s</Types>"""
+
+SHEET_CONTENT_TYPE = '<Override PartName="/xl/worksheets/sheet%d.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+
+ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>\
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties" Target="docProps/core.xml"/>\
+</Relationships>"""
+
+CORE = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" \
+xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/" \
+xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">\
+<dc:creator>benchmarks</dc:creator>\
+<dcterms:modified xsi:type="dcterms:W3CDTF">2012-07-01T05:04:12Z</dcterms:modified>\
+</cp:coreProperties>"""
+
+# Style 0 is General, style 1 a built in date format, style 2 a custom one
+STYLES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="%s">\
+<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy\\-mm\\-dd\\ hh:mm"/></numFmts>\
+<cellXfs count="3">\
+<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>\
+<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>\
+<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>\
+</cellXfs></styleSheet>""" % MAIN_NS
+
+
+def columnLetters(index):
+    """ 1-based column number to letters, so 27 is 'AA' """
+    letters = ''
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+class WorkbookSpec(object):
+    """ Shape of a synthetic workbook.
+    Arguments::
+
+        rows -- rows per sheet
+        cols -- columns per row
+        sheets -- number of sheets
+        sharedRatio -- share of cells holding a shared string
+        uniqueRatio -- distinct shared strings per shared string cell
+        dateRatio -- share of cells holding a date-styled number
+        richTextRatio -- share of shared strings written as rich text runs
+        inlineRatio -- share of cells holding an inline string
+        seed -- random seed, the same spec always gives the same file
+
+    The remaining cells hold plain integers and floats.
+
+    """
+
+    def __init__(self, rows=10000, cols=20, sheets=1, sharedRatio=0.3,
+                 uniqueRatio=0.2, dateRatio=0.1, richTextRatio=0.0,
+                 inlineRatio=0.0, seed=0):
+        self.rows = rows
+        self.cols = cols
+        self.sheets = sheets
+        self.sharedRatio = sharedRatio
+        self.uniqueRatio = uniqueRatio
+        self.dateRatio = dateRatio
+        self.richTextRatio = richTextRatio
+        self.inlineRatio = inlineRatio
+        self.seed = seed
+
+    @property
+    def cells(self):
+        return self.rows * self.cols * self.sheets
+
+    def asDict(self):
+        return dict(self.__dict__)
+
+
+def _sharedStringsXml(strings, richText):
+    yield '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    yield '<sst xmlns="%s" count="%d" uniqueCount="%d">' % (
+        MAIN_NS, len(strings), len(strings))
+    for text, rich in zip(strings, richText):
+        if rich:
+            half = len(text) // 2
+            yield ('<si><r><rPr><b/><sz val="11"/></rPr><t>%s</t></r>'
+                   '<r><rPr><sz val="11"/></rPr><t xml:space="preserve">%s</t></r>'
+                   '<phoneticPr fontId="1" type="noConversion"/></si>'
+                   % (escape(text[:half]), escape(text[half:])))
+        else:
+            yield '<si><t>%s</t></si>' % escape(text)
+    yield '</sst>'
+
+
+def _sheetXml(spec, rng, uniqueStrings):
+    yield '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    yield '<worksheet xmlns="%s" xmlns:r="%s">' % (MAIN_NS, REL_NS)
+    yield '<dimension ref="A1:%s%d"/>' % (columnLetters(spec.cols), spec.rows)
+    yield '<sheetData>'
+    letters = [columnLetters(col) for col in range(1, spec.cols + 1)]
+    sharedLimit = spec.sharedRatio
+    inlineLimit = sharedLimit + spec.inlineRatio
+    dateLimit = inlineLimit + spec.dateRatio
+    for row in range(1, spec.rows + 1):
+        cells = []
+        for column in letters:
+            kind = rng.random()
+            if kind < sharedLimit:
+                cells.append('<c r="%s%d" t="s"><v>%d</v></c>' % (
+                    column, row, rng.randrange(uniqueStrings)))
+            elif kind < inlineLimit:
+                cells.append('<c r="%s%d" t="inlineStr"><is><t>inline %d</t>'
+                             '</is></c>' % (column, row, rng.randrange(1000)))
+            elif kind < dateLimit:
+                cells.append('<c r="%s%d" s="%d"><v>%.6f</v></c>' % (
+                    column, row, rng.choice((1, 2)),
+                    rng.uniform(61, 50000)))
+            elif kind < (1 + dateLimit) / 2:
+                cells.append('<c r="%s%d"><v>%d</v></c>' % (
+                    column, row, rng.randrange(1000000)))
+            else:
+                cells.append('<c r="%s%d"><v>%r</v></c>' % (
+                    column, row, rng.uniform(-1000, 1000)))
+        yield '<row r="%d" spans="1:%d">%s</row>' % (row, spec.cols,
+                                                      ''.join(cells))
+    yield '</sheetData></worksheet>'
+
+
+def _writePart(zipHandle, name, chunks):
+    """ Write an xml part chunk by chunk, so big sheets are never held in
+    memory as a whole
+
+    """
+    with zipHandle.open(name, 'w') as handle:
+        for chunk in chunks:
+            handle.write(chunk.encode('utf-8'))
+
+
+def generateWorkbook(path, spec=None, **kwargs):
+    """ Write a synthetic workbook to path.
+    Arguments::
+
+        path -- file to write
+        spec -- WorkbookSpec, or keyword arguments to build one
+
+    Returns the spec used.
+
+    """
+    if spec is None:
+        spec = WorkbookSpec(**kwargs)
+    rng = random.Random(spec.seed)
+    sharedCells = int(spec.rows * spec.cols * spec.sharedRatio)
+    uniqueStrings = max(1, int(sharedCells * spec.uniqueRatio))
+    strings = ['string %d %s' % (index, 'x' * rng.randrange(1, 20))
+               for index in range(uniqueStrings)]
+    richText = [rng.random() < spec.richTextRatio for index in strings]
+
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zipHandle:
+        sheetIds = range(1, spec.sheets + 1)
+        zipHandle.writestr('[Content_Types].xml', CONTENT_TYPES % ''.join(
+            SHEET_CONTENT_TYPE % sheetId for sheetId in sheetIds))
+        zipHandle.writestr('_rels/.rels', ROOT_RELS)
+        zipHandle.writestr('docProps/core.xml', CORE)
+        zipHandle.writestr('xl/workbook.xml',
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="%s" xmlns:r="%s"><sheets>%s</sheets></workbook>'
+            % (MAIN_NS, REL_NS, ''.join(
+                '<sheet name="Sheet%d" sheetId="%d" r:id="rId%d"/>'
+                % (sheetId, sheetId, sheetId) for sheetId in sheetIds)))
+        zipHandle.writestr('xl/_rels/workbook.xml.rels',
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '%s<Relationship Id="rId%d" Type="%s/styles" Target="styles.xml"/>'
+            '<Relationship Id="rId%d" Type="%s/sharedStrings" Target="sharedStrings.xml"/>'
+            '</Relationships>' % (''.join(
+                '<Relationship Id="rId%d" Type="%s/worksheet" '
+                'Target="worksheets/sheet%d.xml"/>' % (sheetId, REL_NS, sheetId)
+                for sheetId in sheetIds),
+                spec.sheets + 1, REL_NS, spec.sheets + 2, REL_NS))
+        zipHandle.writestr('xl/styles.xml', STYLES)
+        _writePart(zipHandle, 'xl/sharedStrings.xml',
+                   _sharedStringsXml(strings, richText))
+        for sheetId in sheetIds:
+            _writePart(zipHandle, 'xl/worksheets/sheet%d.xml' % sheetId,
+                       _sheetXml(spec, rng, uniqueStrings))
+    return spec
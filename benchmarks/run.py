@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+""" Time the reader hot paths on synthetic workbooks.
+
+Every benchmark runs in its own interpreter, so that the peak RSS it
+reports belongs to that path alone. Usage::
+
+    python -m benchmarks.run --rows 100000 --cols 20 --save baseline.json
+    python -m benchmarks.run --rows 100000 --cols 20 --compare baseline.json
+
+"""
+
+from __future__ import print_function, unicode_literals
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.generate import WorkbookSpec, generateWorkbook
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+# Benchmarks by name: functions taking the workbook path and returning the
+# number of cells processed, and optionally the time to the first row
+BENCHMARKS = {}
+
+
+def benchmark(func):
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+def peakRss():
+    """ Peak resident set size of this process in bytes, None if unknown """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+@benchmark
+def open_workbook(path):
+    from xlsx import Workbook
+    workbook = Workbook(path)
+    workbook.keys()
+    return 0, None
+
+
+@benchmark
+def rows_iter(path):
+    from xlsx import Workbook
+    start = time.time()
+    firstRow = None
+    cells = 0
+    for sheet in Workbook(path):
+        for rowNum, row in sheet.rowsIter():
+            if firstRow is None:
+                firstRow = time.time() - start
+            cells += len(row)
+    return cells, firstRow
+
+
+@benchmark
+def values_iter(path):
+    from xlsx import Workbook
+    start = time.time()
+    firstRow = None
+    cells = 0
+    for sheet in Workbook(path):
+        for rowNum, values in sheet.valuesIter():
+            if firstRow is None:
+                firstRow = time.time() - start
+            cells += len(values)
+    return cells, firstRow
+
+
+@benchmark
+def expat_rows_iter(path):
+    from xlsx import Workbook
+    start = time.time()
+    firstRow = None
+    cells = 0
+    for sheet in Workbook(path, backend='expat'):
+        for rowNum, row in sheet.rowsIter():
+            if firstRow is None:
+                firstRow = time.time() - start
+            cells += len(row)
+    return cells, firstRow
+
+
+@benchmark
+def parallel_rows_iter(path):
+    from xlsx import Workbook
+    start = time.time()
+    firstRow = None
+    cells = 0
+    for sheet in Workbook(path):
+        for rowNum, row in sheet.parallelRowsIter():
+            if firstRow is None:
+                firstRow = time.time() - start
+            cells += len(row)
+    return cells, firstRow
+
+
+@benchmark
+def batches_iter(path):
+    from xlsx import Workbook
+    start = time.time()
+    firstRow = None
+    cells = 0
+    for sheet in Workbook(path):
+        for rowNums, rows in sheet.batchesIter(reuse=True):
+            if firstRow is None:
+                firstRow = time.time() - start
+            cells += sum(len(row) for row in rows)
+    return cells, firstRow
+
+
+@benchmark
+def typed_rows_iter(path):
+    from xlsx import Workbook
+    start = time.time()
+    firstRow = None
+    cells = 0
+    for sheet in Workbook(path, typedValues=True):
+        for rowNum, row in sheet.rowsIter():
+            if firstRow is None:
+                firstRow = time.time() - start
+            cells += len(row)
+    return cells, firstRow
+
+
+@benchmark
+def rows_cols(path):
+    from xlsx import Workbook
+    cells = 0
+    for sheet in Workbook(path):
+        cells += sum(len(row) for row in sheet.rows().values())
+        sheet.cols()
+    return cells, None
+
+
+@benchmark
+def shared_strings(path):
+    from xlsx import Workbook, SharedStrings
+    workbook = Workbook(path)
+    return len(SharedStrings.parse(
+        workbook.domzip.open("xl/sharedStrings.xml"))), None
+
+
+@benchmark
+def shared_strings_dom(path):
+    from xlsx import Workbook, SharedStrings
+    workbook = Workbook(path)
+    return len(SharedStrings(workbook.domzip["xl/sharedStrings.xml"])), None
+
+
+def _export(path, format):
+    """ Export every sheet to a scratch file, counting rows (not cells) """
+    from xlsx import Workbook
+    from xlsx.export import exportSheet, openOutput
+    handle, output = tempfile.mkstemp()
+    os.close(handle)
+    rows = 0
+    try:
+        for sheet in Workbook(path):
+            stream = openOutput(output)
+            try:
+                rows += exportSheet(sheet, stream, format)
+            finally:
+                stream.close()
+    finally:
+        os.remove(output)
+    return rows
+
+
+@benchmark
+def export_csv(path):
+    return _export(path, 'csv'), None
+
+
+@benchmark
+def export_ndjson(path):
+    return _export(path, 'ndjson'), None
+
+
+@benchmark
+def xldate(path):
+    from xlsx.xldate import xldate_as_tuple
+    count = 1000000
+    for index in range(count):
+        xldate_as_tuple(61 + index % 2900000 + 0.25, 0)
+    return count, None
+
+
+def runChild(name, path):
+    """ Run one benchmark in this process and print its result as json """
+    start = time.time()
+    cells, firstRow = BENCHMARKS[name](path)
+    seconds = time.time() - start
+    print(json.dumps({
+        'seconds': seconds,
+        'cells': cells,
+        'cellsPerSecond': cells / seconds if seconds else None,
+        'firstRowSeconds': firstRow,
+        'peakRss': peakRss(),
+    }))
+
+
+def runBenchmark(name, path, repeat):
+    """ Run a benchmark `repeat` times in fresh interpreters, keep the
+    fastest run
+
+    """
+    best = None
+    for attempt in range(repeat):
+        output = subprocess.check_output(
+            [sys.executable, '-m', 'benchmarks.run', '--child', name, path])
+        result = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+        if best is None or result['seconds'] < best['seconds']:
+            best = result
+    return best
+
+
+def formatRow(name, result, baseline=None):
+    line = '%-16s %10.3fs %14s cells/s %10s RSS %12s first row' % (
+        name, result['seconds'],
+        '%.0f' % result['cellsPerSecond'] if result['cellsPerSecond'] else '-',
+        '%.1fMB' % (result['peakRss'] / 1048576.0)
+        if result['peakRss'] else '-',
+        '%.4fs' % result['firstRowSeconds']
+        if result['firstRowSeconds'] is not None else '-')
+    if baseline:
+        line += '  %+.1f%% time' % (
+            (result['seconds'] / baseline['seconds'] - 1) * 100)
+        if result['peakRss'] and baseline.get('peakRss'):
+            line += ' %+.1f%% RSS' % (
+                (float(result['peakRss']) / baseline['peakRss'] - 1) * 100)
+    return line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--child', nargs=2, metavar=('NAME', 'PATH'),
+                        help=argparse.SUPPRESS)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--cols', type=int, default=20)
+    parser.add_argument('--sheets', type=int, default=1)
+    parser.add_argument('--shared-ratio', type=float, default=0.3)
+    parser.add_argument('--unique-ratio', type=float, default=0.2)
+    parser.add_argument('--date-ratio', type=float, default=0.1)
+    parser.add_argument('--rich-text-ratio', type=float, default=0.0)
+    parser.add_argument('--inline-ratio', type=float, default=0.0)
+    parser.add_argument('--workbook', help='benchmark this file instead of '
+                        'generating one')
+    parser.add_argument('--only', action='append', choices=sorted(BENCHMARKS),
+                        help='run only these benchmarks')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--save', help='save the results as a baseline')
+    parser.add_argument('--compare', help='compare against a saved baseline')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='slowdown against the baseline that counts '
+                        'as a regression (default 0.1, 10%%)')
+    args = parser.parse_args(argv)
+
+    if args.child:
+        runChild(*args.child)
+        return 0
+
+    spec = WorkbookSpec(rows=args.rows, cols=args.cols, sheets=args.sheets,
+                        sharedRatio=args.shared_ratio,
+                        uniqueRatio=args.unique_ratio,
+                        dateRatio=args.date_ratio,
+                        richTextRatio=args.rich_text_ratio,
+                        inlineRatio=args.inline_ratio)
+    path = args.workbook
+    cleanup = None
+    if path is None:
+        handle, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(handle)
+        cleanup = path
+        generateWorkbook(path, spec)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)['results']
+
+    results = {}
+    regressions = []
+    try:
+        for name in args.only or sorted(BENCHMARKS):
+            results[name] = runBenchmark(name, path, args.repeat)
+            print(formatRow(name, results[name], baseline.get(name)))
+            if name in baseline and results[name]['seconds'] > \
+                    baseline[name]['seconds'] * (1 + args.tolerance):
+                regressions.append(name)
+    finally:
+        if cleanup:
+            os.remove(cleanup)
+
+    if args.save:
+        with open(args.save, 'w') as handle:
+            json.dump({'spec': spec.asDict() if not args.workbook else
+                       args.workbook, 'results': results}, handle, indent=2,
+                      sort_keys=True)
+    if regressions:
+        print('Regressions: %s' % ', '.join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
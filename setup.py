@@ -28,5 +28,10 @@ setup(
     packages=[
         "xlsx"
     ],
-    test_suite = 'xlsx.tests'
+    test_suite = 'xlsx.tests',
+    entry_points={
+        'console_scripts': [
+            'xlsx-export = xlsx.export:main',
+        ],
+    },
 )
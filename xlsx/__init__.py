@@ -4,17 +4,195 @@
 from __future__ import unicode_literals
 
 __author__="Ståle Undheim <staale@staale.org>"
+__version__="0.4.1"
 
+import io
 import re
+import mmap
+import codecs
+import posixpath
+import threading
 import zipfile
-from xlsx.xldate import xldate_as_tuple
+from xml.parsers import expat
+from array import array
+from collections import OrderedDict
+from xlsx.xldate import xldate_as_tuple, xldate_as_datetime, XLDateError
 from xlsx.formatting import is_date_format_string
-from xlsx.timemachine import UnicodeMixin
+from xlsx.store import SheetStore, RowsView, ColsView
+from xlsx.stats import Stats, CountingReader, countingDecoder, timedRows, \
+    PHASE_PARSE, PHASE_SHARED_STRINGS, PHASE_LOAD
+from xlsx.timemachine import UnicodeMixin, cached_property, string_types, \
+    text_type, buffer_types, intern_text
 
 try:
     from xml.etree import cElementTree as ET
-except:
-    import cElementTree as ET
+except ImportError: # Gone in Python 3.9, ElementTree is accelerated anyway
+    from xml.etree import ElementTree as ET
+
+_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+
+# Kinds of cell styles, as resolved once per `cellXfs` entry by the Workbook
+STYLE_NUMBER = 0
+STYLE_DATE = 1
+STYLE_TEXT = 2
+
+# Built in number formats that display dates
+BUILTIN_DATE_FORMATS = frozenset(range(14, 22+1))
+# Built in number format that displays text ("@")
+BUILTIN_TEXT_FORMAT = 49
+
+numberPattern = re.compile(r"^[\d\.]+$")
+
+class ErrorValue(text_type):
+    """ Error code of a cell (t="e") in typed value mode, such as '#N/A'
+    or '#DIV/0!'. Compares equal to the code text.
+
+    """
+    __slots__ = ()
+
+def _number(text):
+    """ Decode the text of a number `<v>` node. Integer-looking text that a
+    double holds exactly (up to 15 digits) becomes an int, anything else a
+    float.
+
+    """
+    if len(text) < 16 and '.' not in text and 'E' not in text:
+        try:
+            return int(text)
+        except ValueError:
+            pass
+    return float(text)
+
+# Highest column number in a worksheet, column XFD
+_MAX_COLUMN = 16384
+
+def _computeColumnLetters(index):
+    letters = ''
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+# Letters of every worksheet column by number (entry 0 is unused), and the
+# numbers by letters
+_COLUMN_LETTERS = [_computeColumnLetters(index)
+                   for index in range(_MAX_COLUMN + 1)]
+_COLUMN_INDEXES = dict((letters, index)
+                       for index, letters in enumerate(_COLUMN_LETTERS))
+
+def columnIndex(column):
+    """ Convert column letters to a 1-based column number, so 'A' is 1 and
+    'AA' is 27.
+
+    """
+    try:
+        return _COLUMN_INDEXES[column]
+    except KeyError:
+        index = 0
+        for letter in column.upper():
+            index = index * 26 + ord(letter) - 64
+        return index
+
+def columnLetters(index):
+    """ Convert a 1-based column number to column letters, so 1 is 'A' and
+    27 is 'AA'.
+
+    """
+    if 0 < index <= _MAX_COLUMN:
+        return _COLUMN_LETTERS[index]
+    return _computeColumnLetters(index)
+
+_DIGITS = '0123456789'
+
+addrPattern = re.compile(r"([a-zA-Z]*)(\d*)")
+
+rangePattern = re.compile(r"^([A-Za-z]*)(\d*)(?::([A-Za-z]*)(\d*))?$")
+
+def parseRange(ref):
+    """ Parse a cell range such as 'A1:F5000', 'A:F', '1:5000' or 'B7'
+    into (minColumn, minRow, maxColumn, maxRow), with column numbers as
+    given by columnIndex and None for open ends.
+
+    """
+    match = rangePattern.match(ref)
+    if match is None:
+        raise ValueError("Invalid cell range %r" % (ref,))
+    firstColumn, firstRow, lastColumn, lastRow = match.groups()
+    if lastColumn is None:
+        lastColumn, lastRow = firstColumn, firstRow
+    return (columnIndex(firstColumn) if firstColumn else None,
+            int(firstRow) if firstRow else None,
+            columnIndex(lastColumn) if lastColumn else None,
+            int(lastRow) if lastRow else None)
+
+# Bytes read at a time while looking for the start of the sheet data, and
+# while scanning a whole sheet document
+_HEADER_BLOCK = 1 << 16
+_SCAN_BLOCK = 1 << 20
+
+# The `<sheetData>` start tag with its namespace prefix, and the `ref` of
+# the `<dimension>` element in the header before it
+_SHEET_DATA = re.compile(br'<(([^\s/>:]+:)?sheetData)(?:\s[^>]*?)?(/?)>')
+_DIMENSION = re.compile(
+    br'<(?:[^\s/>:]+:)?dimension\s(?:[^>]*?\s)?ref=(["\'])(.*?)\1')
+
+# The row numbers of `<row>` tags, and the column letters of `<c>` tags
+_ROW_NUMBER = re.compile(br'<(?:[^\s/>:]+:)?row\s(?:[^>]*?\s)?r=["\'](\d+)')
+_CELL_COLUMN = re.compile(
+    br'<(?:[^\s/>:]+:)?c\s(?:[^>]*?\s)?r=["\']([A-Za-z]+)')
+
+# A dimension naming a cell or a range of cells
+_CELL_RANGE = re.compile(r"^[A-Z]+\d+(?::[A-Z]+\d+)?$")
+
+# Some writers give every sheet the dimension 'A1'; a single cell dimension
+# of a sheet document bigger than this many bytes is not trusted
+_STALE_DIMENSION_SIZE = 1 << 16
+
+def _readSheetHeader(handle):
+    """ Read a sheet document from handle up to its `<sheetData>` start tag.
+    Returns the bytes read, which may go past the tag, and the match of the
+    tag (None for a document without one).
+
+    """
+    data = b''
+    while True:
+        block = handle.read(_HEADER_BLOCK)
+        data += block
+        sheetData = _SHEET_DATA.search(data)
+        if sheetData is not None or not block:
+            return data, sheetData
+
+def _scanUsedRange(handle):
+    """ Bounds of the cells of a sheet document read from handle, as
+    (minColumn, minRow, maxColumn, maxRow) like parseRange, from the `r`
+    attributes of its rows and cells. The raw bytes are matched, nothing is
+    parsed. Returns None for a document without any cell.
+
+    """
+    minRow = maxRow = None
+    columns = set()
+    data = b''
+    while True:
+        block = handle.read(_SCAN_BLOCK)
+        data += block
+        # A tag cut by the end of the block is matched with the next one
+        cut = data.rfind(b'<') if block else -1
+        if cut == -1:
+            cut = len(data)
+        chunk, data = data[:cut], data[cut:]
+        rowNums = [int(rowNum) for rowNum in _ROW_NUMBER.findall(chunk)]
+        if rowNums:
+            low, high = min(rowNums), max(rowNums)
+            minRow = low if minRow is None else min(minRow, low)
+            maxRow = high if maxRow is None else max(maxRow, high)
+        columns.update(_CELL_COLUMN.findall(chunk))
+        if not block:
+            break
+    if not columns or minRow is None:
+        return None
+    columnNums = [columnIndex(column.decode('ascii').upper())
+                  for column in columns]
+    return min(columnNums), minRow, max(columnNums), maxRow
 
 class DomZip(object):
     """ Excel xlsx files are zip files containing xml documents.
@@ -22,16 +200,43 @@ class DomZip(object):
 
     """
 
-    def __init__(self, filename):
+    # Documents up to this many (uncompressed) bytes are parsed in one go
+    # by iterparse, bigger ones are streamed
+    inMemoryLimit = 1 << 20
+
+    # xlsx.stats.Stats counting inflated bytes and parse time, if any
+    stats = None
+
+    def __init__(self, filename, memoryMap=False, etree=None):
         """ Open up the xlsx document.
         Arguments::
 
-            filename -- can be a filepath or a file-like object
+            filename -- can be a filepath, a file-like object or a
+                bytes-like buffer (bytes, bytearray, memoryview or mmap)
+            memoryMap -- memory map a filepath instead of reading it
+                through a file object
+            etree -- ElementTree compatible module that parses documents,
+                ElementTree by default, see xlsx.backends
 
         """
 
         self.ziphandle = None
+        self.etree = etree or ET
+        self.__file = None
+        self.__mmap = None
+        self.__buffer = None
+        if memoryMap and isinstance(filename, string_types):
+            self.__file = open(filename, 'rb')
+            self.__mmap = mmap.mmap(self.__file.fileno(), 0,
+                                    access=mmap.ACCESS_READ)
+            filename = self.__mmap
+        if isinstance(filename, buffer_types):
+            filename = self.__buffer = BufferReader(filename)
         self.ziphandle = zipfile.ZipFile(filename, 'r')
+        # ZipInfo of every member by name: header offset, compressed and
+        # uncompressed sizes
+        self.members = dict((info.filename, info)
+                            for info in self.ziphandle.infolist())
 
     def __getitem__(self, key):
         """ Get a domtree from a document in the zip file
@@ -41,54 +246,427 @@ class DomZip(object):
 
         """
 
-        return ET.fromstring(self.ziphandle.read(key))
+        if self.stats is None:
+            return self.__parse(self.members[key])
+        with self.stats.timer(PHASE_PARSE):
+            return self.__parse(self.members[key])
+
+    def __parse(self, info, stats=None):
+        handle = self.__openMember(info, stats)
+        try:
+            # The parser pulls the document in chunks as it is inflated
+            return self.etree.parse(handle).getroot()
+        finally:
+            handle.close()
+
+    def __openMember(self, info, stats=None):
+        """ Open a member, counting the bytes inflated into stats (by
+        default our own) when there are any
+
+        """
+        handle = self.ziphandle.open(info)
+        stats = stats or self.stats
+        if stats is not None:
+            return CountingReader(handle, stats)
+        return handle
+
+    def __contains__(self, key):
+        return key in self.members
+
+    def read(self, key):
+        """ Get the raw bytes of a document in the zip file
+        Arguments::
+
+            key -- path inside the zip file
+
+        """
+
+        info = self.members[key]
+        if self.stats is not None:
+            self.stats.add(bytesInflated=info.file_size)
+        return self.ziphandle.read(info)
+
+    def size(self, key):
+        """ Uncompressed size in bytes of a document in the zip file
+        Arguments::
+
+            key -- path inside the zip file
+
+        """
+
+        return self.members[key].file_size
+
+    def open(self, key, stats=None):
+        """ Open a document in the zip file as a file object, inflated as
+        it is read
+        Arguments::
+
+            key -- path inside the zip file
+            stats -- xlsx.stats.Stats to count the inflated bytes into,
+                instead of our own
+
+        """
+
+        return self.__openMember(self.members[key], stats)
+
+    def iterparse(self, key, tag, parentTag, stats=None):
+        """ Incrementally parse a document in the zip file, yielding every
+        `tag` element as soon as it is complete. Yielded elements are
+        discarded once the consumer asks for the next one, so memory stays
+        bounded by a single element. Parsing stops at the end of the first
+        `parentTag` element. Documents no bigger than inMemoryLimit are
+        parsed at once instead.
+        Arguments::
+
+            key -- path inside the zip file (xml document)
+            tag -- qualified tag of the elements to yield
+            parentTag -- qualified tag of the element containing them
+            stats -- xlsx.stats.Stats to count the inflated bytes into,
+                instead of our own
+
+        """
+
+        info = self.members[key]
+        if info.file_size <= self.inMemoryLimit:
+            # Small documents are cheaper to parse at once
+            root = self.__parse(info, stats)
+            for parent in root.iter(parentTag):
+                for node in parent:
+                    if node.tag == tag:
+                        yield node
+                break
+            return
+
+        handle = self.__openMember(info, stats)
+        try:
+            parent = None
+            for event, node in self.etree.iterparse(handle,
+                                                    events=('start', 'end')):
+                if event == 'start':
+                    if node.tag == parentTag:
+                        parent = node
+                elif node.tag == tag:
+                    yield node
+                    if parent is not None:
+                        del parent[:]
+                    node.clear()
+                elif node.tag == parentTag:
+                    break
+        finally:
+            handle.close()
 
     def __del__(self):
         """Close the zip file when finished"""
 
         if self.ziphandle:
             self.ziphandle.close()
+        if self.__buffer is not None:
+            self.__buffer.close()
+        if self.__mmap is not None:
+            self.__mmap.close()
+            self.__file.close()
+        self.__buffer = self.__mmap = self.__file = None
+
+class BufferReader(io.RawIOBase):
+    """ Read-only file object over a bytes-like buffer (bytes, bytearray,
+    memoryview or mmap). Reads only copy the requested range, so a
+    workbook held in memory is never duplicated as a whole.
+
+    """
+
+    def __init__(self, buffer):
+        self.buffer = memoryview(buffer)
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += len(self.buffer)
+        if offset < 0:
+            raise ValueError("Negative seek position %d" % offset)
+        self.position = offset
+        return offset
+
+    def read(self, size=-1):
+        start = min(self.position, len(self.buffer))
+        end = len(self.buffer) if size is None or size < 0 \
+            else min(start + size, len(self.buffer))
+        self.position = end
+        return self.buffer[start:end].tobytes()
+
+    def readinto(self, target):
+        data = self.read(len(target))
+        target[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self.buffer.release()
+        super(BufferReader, self).close()
 
 class Workbook(object):
     """Main class that contains sheets organized by name or by id.
     Id being the order number of the sheet starting from 1
 
     """
-    def __init__(self, filename):
+    def __init__(self, filename, lazySharedStrings=False,
+                 sharedStringsCacheSize=65536, internStrings=False,
+                 memoryMap=False, cache=None, typedValues=False, stats=None,
+                 backend='etree'):
+        """ Open a workbook.
+        Arguments::
+
+            filename -- can be a filepath, a file-like object, a
+                bytes-like buffer (bytes, bytearray, memoryview or mmap) or
+                an open DomZip to share
+            lazySharedStrings -- index the shared strings instead of
+                decoding them all up front, see LazySharedStrings
+            sharedStringsCacheSize -- number of decoded strings kept by
+                the lazy shared strings table
+            internStrings -- let equal lazily decoded strings share one
+                object
+            memoryMap -- memory map a filepath instead of reading it
+                through a file object
+            cache -- xlsx.cache.WorkbookCache to keep decoded sheets,
+                shared strings and styles in between runs
+            typedValues -- decode cell values to Python types: int or
+                float for numbers, bool, datetime for date-formatted
+                numbers, ErrorValue for error codes, str for text and None
+                for empty cells, see Sheet._typedCellValue. By default
+                numbers are left as their text and dates are tuples.
+            stats -- xlsx.stats.Stats to record counters and phase timings
+                in, or True for new ones, see xlsx.stats. Every sheet gets
+                its own Stats rolling up into these.
+            backend -- name of the xml parser backend ('etree', 'expat' or
+                'lxml') or an xlsx.backends.Backend, see xlsx.backends
+
+        """
+        from xlsx.backends import getBackend
+
         self.__sheetsById = {}
         self.__sheetsByName = {}
         self.filename = filename
-        self.domzip = DomZip(filename)
-        try : # Not all xlsx documents contain Shared Strings
-            self.sharedStrings = SharedStrings(
-                self.domzip["xl/sharedStrings.xml"])
-        except KeyError :
-            self.sharedStrings = None
-
-        # Extract the last modification date; based upon an answer at:
-        #  http://superuser.com/questions/195548/excel-2007-modify-creation-date-statistics
-        self.dcterms_modified = None
-        modified_date_elements = self.domzip["docProps/core.xml"].findtext("{http://purl.org/dc/terms/}modified")
-        if modified_date_elements:
-            self.dcterms_modified = modified_date_elements
-
-        self.styleSheet = self.domzip["xl/styles.xml"]
-        self.cellStyles = (self.styleSheet.find('{http://schemas.openxmlformats.org/spreadsheetml/2006/main}cellXfs'))
-        self.numFmts = {}
-        if self.styleSheet.find('{http://schemas.openxmlformats.org/spreadsheetml/2006/main}numFmts') is not None:
-            self.numFmts = dict((x.get('numFmtId'), x.get('formatCode')) for x in self.styleSheet.find('{http://schemas.openxmlformats.org/spreadsheetml/2006/main}numFmts'))
+        self.backend = getBackend(backend)
+        self.domzip = filename if isinstance(filename, DomZip) \
+            else DomZip(filename, memoryMap=memoryMap,
+                        etree=self.backend.etree)
+        self.lazySharedStrings = lazySharedStrings
+        self.sharedStringsCacheSize = sharedStringsCacheSize
+        self.internStrings = internStrings
+        self.typedValues = typedValues
+        self.stats = Stats() if stats is True else stats or None
+        if self.stats is not None:
+            self.domzip.stats = self.stats
+        self.cacheEntry = cache.entry(filename) if cache is not None else None
 
         workbookDoc = self.domzip["xl/workbook.xml"]
         sheets = workbookDoc.find("{http://schemas.openxmlformats.org/spreadsheetml/2006/main}sheets")
+        targets = self._relationshipTargets("xl/_rels/workbook.xml.rels", "xl")
         id = 1
         for sheetNode in sheets:
             name = sheetNode.get("name")
-            sheet = Sheet(self, id, name)
+            path = targets.get(sheetNode.get(
+                "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"))
+            sheet = Sheet(self, id, name, path)
             self.__sheetsById[id] = sheet
             self.__sheetsByName[name] = sheet
             assert sheet.name in self.__sheetsByName
             id += 1
 
+    def _relationshipTargets(self, key, base):
+        """ Map the relationship ids of a `.rels` document to the part
+        names they point to, resolved against the `base` folder. Returns an
+        empty dict when the document is missing.
+
+        """
+        if key not in self.domzip:
+            return {}
+        targets = {}
+        for relNode in self.domzip[key]:
+            target = relNode.get("Target")
+            if relNode.get("TargetMode") == "External" or not target:
+                continue
+            if target.startswith("/"):
+                target = target[1:]
+            else:
+                target = posixpath.normpath(posixpath.join(base, target))
+            targets[relNode.get("Id")] = target
+        return targets
+
+    # The other parts of the workbook are only parsed when first used, so
+    # that listing sheets does not pay for styles or shared strings
+
+    @cached_property
+    def sharedStrings(self):
+        if self.stats is None:
+            return self._loadSharedStrings()
+        with self.stats.timer(PHASE_SHARED_STRINGS):
+            return self._loadSharedStrings()
+
+    def _loadSharedStrings(self):
+        if self.cacheEntry is not None:
+            sharedStrings = self.cacheEntry.loadStrings()
+            if sharedStrings is not None:
+                return sharedStrings or None
+            sharedStrings = self._readSharedStrings()
+            self.cacheEntry.storeStrings(sharedStrings)
+            return sharedStrings
+        return self._readSharedStrings()
+
+    def _readSharedStrings(self):
+        try : # Not all xlsx documents contain Shared Strings
+            if self.lazySharedStrings:
+                return LazySharedStrings(
+                    self.domzip.read("xl/sharedStrings.xml"),
+                    cacheSize=self.sharedStringsCacheSize,
+                    intern=self.internStrings)
+            handle = self.domzip.open("xl/sharedStrings.xml")
+            try:
+                return self.backend.readSharedStrings(
+                    handle, self.domzip.size("xl/sharedStrings.xml"))
+            finally:
+                handle.close()
+        except KeyError :
+            return None
+
+    @cached_property
+    def dcterms_modified(self):
+        # Extract the last modification date; based upon an answer at:
+        #  http://superuser.com/questions/195548/excel-2007-modify-creation-date-statistics
+        try:
+            coreDoc = self.domzip["docProps/core.xml"]
+        except KeyError:
+            return None
+        return coreDoc.findtext("{http://purl.org/dc/terms/}modified") or None
+
+    @cached_property
+    def styleSheet(self):
+        return self.domzip["xl/styles.xml"]
+
+    @cached_property
+    def cellStyles(self):
+        return self.styleSheet.find('{http://schemas.openxmlformats.org/spreadsheetml/2006/main}cellXfs')
+
+    @cached_property
+    def numFmts(self):
+        numFmtsNode = self.styleSheet.find('{http://schemas.openxmlformats.org/spreadsheetml/2006/main}numFmts')
+        if numFmtsNode is None:
+            return {}
+        return dict((x.get('numFmtId'), x.get('formatCode')) for x in numFmtsNode)
+
+    @cached_property
+    def styleKinds(self):
+        if self.cacheEntry is not None:
+            styleKinds = self.cacheEntry.loadStyleKinds()
+            if styleKinds is None:
+                styleKinds = self._resolveStyleKinds()
+                self.cacheEntry.storeStyleKinds(styleKinds)
+            return styleKinds
+        return self._resolveStyleKinds()
+
+    def _resolveStyleKinds(self):
+        """ Classify every `cellXfs` entry once, so cells only need to index
+        the returned array by their `s` attribute to know whether they hold
+        a date (STYLE_DATE), text (STYLE_TEXT) or a plain number
+        (STYLE_NUMBER).
+
+        """
+        kinds = array('B')
+        if self.cellStyles is None:
+            return kinds
+        for xfNode in self.cellStyles:
+            numFmtId = xfNode.get('numFmtId')
+            if numFmtId is None:
+                kinds.append(STYLE_NUMBER)
+            elif int(numFmtId) in BUILTIN_DATE_FORMATS:
+                kinds.append(STYLE_DATE)
+            elif numFmtId in self.numFmts:
+                formatCode = self.numFmts[numFmtId]
+                if is_date_format_string(formatCode):
+                    kinds.append(STYLE_DATE)
+                elif formatCode == '@':
+                    kinds.append(STYLE_TEXT)
+                else:
+                    kinds.append(STYLE_NUMBER)
+            elif int(numFmtId) == BUILTIN_TEXT_FORMAT:
+                kinds.append(STYLE_TEXT)
+            else:
+                kinds.append(STYLE_NUMBER)
+        return kinds
+
+    def loadSheets(self, keys=None, workers=None, executor='thread'):
+        """ Load several sheets at once (see Sheet.rows), in parallel.
+        Every worker reads its sheets through its own zip file handle and
+        sends back plain row tuples; the shared strings and style table are
+        parsed once here and handed to each worker when it starts. Sheets
+        found in the cache are not handed to workers, and the ones loaded
+        are stored in it.
+        Arguments::
+
+            keys -- names or ids of the sheets to load, all sheets if None
+            workers -- maximum number of workers, see concurrent.futures
+            executor -- 'thread' or 'process'. Process workers reopen the
+                workbook, so the workbook must have been opened by path.
+
+        Returns the loaded sheets, in the order of keys.
+
+        """
+        if keys is None:
+            keys = sorted(self.__sheetsById)
+        requested = [self[key] for key in keys]
+        sheets = [sheet for sheet in requested
+                  if not sheet.loaded and not sheet._loadCached()]
+        if not sheets:
+            return requested
+
+        isPath = isinstance(self.filename, string_types)
+        if executor == 'process':
+            if not isPath:
+                raise ValueError("Process workers need a workbook opened "
+                                 "by path, not a %s"
+                                 % type(self.filename).__name__)
+            source = self.filename
+        elif executor == 'thread':
+            # File objects can not be reopened, threads share our handle
+            source = self.filename if isPath else self.domzip
+        else:
+            raise ValueError("Unknown executor kind %r" % (executor,))
+
+        initargs = (source, self._workerSharedStrings(executor),
+                    self.styleKinds, self.typedValues, self.backend.name)
+        pool, taskArgs = _startPool(executor, workers, _initSheetWorker,
+                                    initargs)
+        try:
+            results = [pool.submit(_readSheetRows, sheet.id, sheet.path,
+                                   *taskArgs)
+                       for sheet in sheets]
+            for sheet, result in zip(sheets, results):
+                sheet._fill(result.result())
+                sheet._storeCached()
+        finally:
+            pool.shutdown()
+        return requested
+
+    def _workerSharedStrings(self, executor):
+        """ The shared strings to hand to workers of an executor kind """
+        sharedStrings = self.sharedStrings
+        if executor == 'process' and sharedStrings is not None and \
+                not isinstance(sharedStrings,
+                               (SharedStrings, LazySharedStrings)):
+            # Cached strings are views of a memory map, send a copy
+            sharedStrings = list(sharedStrings)
+        return sharedStrings
+
     def keys(self):
         return self.__sheetsByName.keys()
 
@@ -116,9 +694,104 @@ class Workbook(object):
 
 class SharedStrings(list):
 
+    # Most items the uniqueCount of a document of unknown size may pre-size
+    # the table for
+    maxPresize = 1 << 20
+
     def __init__(self, sharedStringsDom):
-        nodes = [x for x in sharedStringsDom]
-        self.extend([self._convertText(node) for node in nodes])
+        self.extend(self._convertText(node) for node in sharedStringsDom)
+
+    @classmethod
+    def parse(cls, handle, size=None):
+        """ Decode a `sharedStrings.xml` document from a file object in a
+        single streaming pass, without building a dom. Gives the same
+        strings as _convertText.
+        Arguments::
+
+            handle -- file object of the document
+            size -- uncompressed size of the document, if known. The
+                table is pre-sized for the document's uniqueCount, but
+                never for more items than this size allows.
+
+        """
+        return cls(()).__parse(handle, size)
+
+    def __parse(self, handle, size):
+        # Tag names as reported by expat with '}' as namespace separator
+        siTag = _MAIN_NS + '}si'
+        tTag = _MAIN_NS + '}t'
+        rTag = _MAIN_NS + '}r'
+        sstTag = _MAIN_NS + '}sst'
+
+        # State of the current <si>: the tag of its first child, the text
+        # parts collected so far, and how deep we are below it
+        state = {'index': 0, 'first': None, 'parts': None, 'depth': 0,
+                 'collect': False}
+        strings = self
+
+        def start(name, attrs):
+            depth = state['depth']
+            if depth == 0:
+                if name == siTag:
+                    state['depth'] = 1
+                    state['first'] = None
+                    state['parts'] = []
+                elif name == sstTag and 'uniqueCount' in attrs:
+                    # Pre-size the table, trimmed at the end. An item takes
+                    # at least 10 bytes, so a bogus count can not make us
+                    # allocate more than the document could fill.
+                    limit = self.maxPresize if size is None else size // 10
+                    try:
+                        count = int(attrs['uniqueCount'])
+                    except ValueError:
+                        count = 0
+                    strings.extend([None] * max(0, min(count, limit)))
+                return
+            state['depth'] = depth + 1
+            if depth == 1 and state['first'] is None:
+                # Plain text is only the first <t>, rich text every <t>
+                # below the <si>
+                state['first'] = name
+                if name == tTag:
+                    state['collect'] = True
+                elif name != rTag:
+                    raise Exception('Unknow tag.', '{' + name)
+            elif name == tTag and state['first'] == rTag:
+                state['collect'] = True
+
+        def end(name):
+            depth = state['depth']
+            if depth == 0:
+                return
+            state['depth'] = depth - 1
+            if depth == 1:
+                parts = state['parts']
+                if state['first'] == rTag:
+                    text = ''.join(parts) or None
+                else:
+                    text = ''.join(parts) if parts else None
+                index = state['index']
+                if index < len(strings):
+                    strings[index] = text
+                else:
+                    strings.append(text)
+                state['index'] = index + 1
+            elif name == tTag:
+                state['collect'] = False
+
+        def characters(data):
+            if state['collect']:
+                state['parts'].append(data)
+
+        parser = expat.ParserCreate(namespace_separator='}')
+        parser.buffer_text = True
+        parser.buffer_size = 1 << 16
+        parser.StartElementHandler = start
+        parser.EndElementHandler = end
+        parser.CharacterDataHandler = characters
+        parser.ParseFile(handle)
+        del strings[state['index']:]
+        return strings
 
     @staticmethod
     def _convertText(siNode):
@@ -137,147 +810,833 @@ class SharedStrings(list):
             return text or None
         raise Exception('Unknow tag.', firstNode.tag)
 
+_missing = object()
+
+class LazySharedStrings(object):
+    """ Shared strings table that decodes entries on demand.
+    The raw `sharedStrings.xml` part is scanned once for the byte offsets
+    of its `<si>` items; an item is only parsed (with
+    `SharedStrings._convertText`) when a cell refers to it, and the most
+    recently used results are kept in a bounded LRU cache.
+
+    """
+
+    def __init__(self, data, cacheSize=65536, intern=False):
+        """ Index a shared strings part.
+        Arguments::
+
+            data -- raw bytes of xl/sharedStrings.xml
+            cacheSize -- maximum number of decoded strings to keep
+            intern -- share one object between equal decoded strings,
+                through the interpreter's table (sys.intern)
+
+        """
+
+        self.data = data
+        self.cacheSize = cacheSize
+        self.__cache = OrderedDict()
+        self.intern = intern
+
+        # Items are parsed inside a copy of the root start tag, so that
+        # they see the same namespace declarations as in the full document
+        start = len(codecs.BOM_UTF8) \
+            if data.startswith(codecs.BOM_UTF8) else 0
+        rootStart = data.index(b'<', data.index(b'?>', start) + 2) \
+            if data.startswith(b'<?', start) else data.index(b'<', start)
+        rootEnd = data.index(b'>', rootStart) + 1
+        rootName = re.match(br'<([^\s>/]+)', data[rootStart:rootEnd]).group(1)
+        prefix = rootName[:rootName.index(b':') + 1] if b':' in rootName else b''
+        self.__header = data[rootStart:rootEnd]
+        self.__footer = b'</' + rootName + b'>'
+
+        self.__starts = array('L')
+        self.__ends = array('L')
+        self.__index(data, rootEnd, b'<' + prefix + b'si',
+                     b'</' + prefix + b'si>')
+
+    def __index(self, data, pos, openTag, closeTag):
+        starts = self.__starts
+        ends = self.__ends
+        find = data.find
+        tagLength = len(openTag)
+        closeLength = len(closeTag)
+        while True:
+            start = find(openTag, pos)
+            if start == -1:
+                break
+            pos = start + tagLength
+            if data[pos:pos + 1] not in (b'>', b' ', b'/', b'\t', b'\r', b'\n'):
+                continue
+            tagEnd = find(b'>', pos)
+            if data[tagEnd - 1:tagEnd] == b'/':
+                end = tagEnd + 1
+            else:
+                end = find(closeTag, tagEnd) + closeLength
+            starts.append(start)
+            ends.append(end)
+            pos = end
+
+    def __len__(self):
+        return len(self.__starts)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        cache = self.__cache
+        # pop/set rather than a membership test, so that threads sharing
+        # the table can not evict an entry in between
+        text = cache.pop(index, _missing)
+        if text is not _missing:
+            cache[index] = text
+            return text
+
+        start = self.__starts[index]
+        end = self.__ends[index]
+        root = ET.fromstring(self.__header + self.data[start:end] +
+                             self.__footer)
+        text = SharedStrings._convertText(root[0])
+        if self.intern and text is not None:
+            text = intern_text(text)
+
+        if self.cacheSize > 0:
+            cache[index] = text
+            if len(cache) > self.cacheSize:
+                try:
+                    cache.popitem(last=False)
+                except KeyError:
+                    pass
+        return text
+
 class Sheet(object):
 
-    def __init__(self, workbook, id, name):
+    def __init__(self, workbook, id, name, path=None):
+        """ A sheet of a workbook.
+        Arguments::
+
+            workbook -- the Workbook the sheet belongs to
+            id -- position of the sheet in the workbook, starting from 1
+            name -- name of the sheet
+            path -- part name of the sheet document inside the zip file,
+                by default xl/worksheets/sheet<id>.xml
+
+        """
         self.workbook = workbook
         self.id = id
         self.name = name
+        self.path = path or "xl/worksheets/sheet%d.xml" % id
         self.loaded = False
-        self.addrPattern = re.compile("([a-zA-Z]*)(\d*)")
-        self.__cells = {}
-        self.__cols = None
-        self.__rows = None
+        self.addrPattern = addrPattern
+        self.__store = None
+        self.__lookedUp = False
+        # Indexes built by index, by their arguments
+        self.__indexes = {}
+        self.stats = workbook.stats.child(name) \
+            if workbook.stats is not None else None
+
+    def _rowNodes(self):
+        """ Incrementally parse the `<row>` nodes of the sheet document """
+        return self.workbook.domzip.iterparse(
+            self.path,
+            "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}row",
+            "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}sheetData",
+            self.stats)
+
+    @staticmethod
+    def _cellValue(columnNode, sharedStrings, styleKinds):
+        """ Decode the value of a `<c>` node: shared strings are resolved,
+        date-formatted numbers become date tuples and anything else is the
+        raw text of the node.
+
+        """
+        colType = columnNode.get("t")
+        valueNode = columnNode.find('{http://schemas.openxmlformats.org/spreadsheetml/2006/main}v')
+        if valueNode is not None:
+            if colType == "s":
+                return sharedStrings[int(valueNode.text)]
+            #Built in and custom date-formatted fields
+            cellS = columnNode.get("s")
+            if cellS and styleKinds[int(cellS)] == STYLE_DATE \
+                and numberPattern.match(valueNode.text):
+                return xldate_as_tuple(float(valueNode.text), datemode=0)
+            return valueNode.text
+        elif colType == "inlineStr" and columnNode.find("{http://schemas.openxmlformats.org/spreadsheetml/2006/main}is") is not None:
+            return columnNode[0][0].text
+        return ''
+
+    @staticmethod
+    def _typedCellValue(columnNode, sharedStrings, styleKinds):
+        """ Decode the value of a `<c>` node to a Python type, once, from
+        its `t` attribute and style. See Workbook's typedValues.
+
+        """
+        colType = columnNode.get("t")
+        valueNode = columnNode.find('{http://schemas.openxmlformats.org/spreadsheetml/2006/main}v')
+        if valueNode is None:
+            if colType == "inlineStr" and columnNode.find("{http://schemas.openxmlformats.org/spreadsheetml/2006/main}is") is not None:
+                return columnNode[0][0].text
+            return None
+        text = valueNode.text
+        if text is None:
+            return None
+        if colType is None or colType == "n":
+            cellS = columnNode.get("s")
+            if cellS:
+                kind = styleKinds[int(cellS)]
+                if kind == STYLE_DATE:
+                    try:
+                        return xldate_as_datetime(float(text), datemode=0)
+                    except XLDateError:
+                        # Negative or out of range serials stay numbers
+                        pass
+                elif kind == STYLE_TEXT:
+                    # Numbers formatted as text ("@") keep their digits
+                    return text
+            return _number(text)
+        if colType == "s":
+            return sharedStrings[int(text)]
+        if colType == "b":
+            return text == "1"
+        if colType == "e":
+            return ErrorValue(text)
+        return text
+
+    def _valueDecoder(self):
+        """ The cell value decoder of the workbook's backend for its value
+        mode
+
+        """
+        return self.workbook.backend.valueDecoder(self.workbook.typedValues)
 
     def rowsIter(self):
-        sheetDoc = self.workbook.domzip["xl/worksheets/sheet%d.xml" % self.id]
-        sheetData = sheetDoc.find("{http://schemas.openxmlformats.org/spreadsheetml/2006/main}sheetData")
-        # @type sheetData Element
-        for rowNode in sheetData:
+        """ Stream the rows of the sheet as (rowNum, cells) tuples.
+        The sheet document is parsed incrementally, so only the current
+        row is held in memory.
+
+        """
+        return self._rowsIter(Cell)
+
+    def rangeIter(self, ref=None, columns=None, minRow=None, maxRow=None):
+        """ Stream the (rowNum, cells) tuples of part of the sheet, like
+        rowsIter. Rows and cells outside the requested part are skipped
+        without decoding their values, and parsing stops after maxRow.
+        Rows without any requested cell are left out.
+        Arguments::
+
+            ref -- cell range such as 'A1:F5000', 'A:F' or '1:5000'
+            columns -- collection of column letters to keep, within the
+                columns of ref if both are given; a string is one column
+            minRow -- first row to keep
+            maxRow -- last row to keep
+
+        """
+        minColumn = maxColumn = None
+        if ref is not None:
+            minColumn, refMinRow, maxColumn, refMaxRow = parseRange(ref)
+            if refMinRow is not None:
+                minRow = max(minRow or 0, refMinRow)
+            if refMaxRow is not None:
+                maxRow = refMaxRow if maxRow is None else min(maxRow, refMaxRow)
+
+        if columns is not None:
+            if isinstance(columns, string_types):
+                columns = (columns,)
+            columns = frozenset(column.upper() for column in columns)
+            if minColumn is not None or maxColumn is not None:
+                columns = frozenset(
+                    column for column in columns
+                    if (minColumn or 1) <= columnIndex(column)
+                    <= (maxColumn or _MAX_COLUMN))
+            columnFilter = columns.__contains__
+        elif minColumn is not None or maxColumn is not None:
+            minColumn = minColumn or 1
+            maxColumn = maxColumn or _MAX_COLUMN
+            columnFilter = lambda column: \
+                minColumn <= columnIndex(column) <= maxColumn
+        else:
+            columnFilter = None
+
+        for rowNum, cells in self._rowsIter(Cell, minRow, maxRow,
+                                            columnFilter):
+            if cells:
+                yield rowNum, cells
+
+    def parallelRowsIter(self, workers=None, chunkBytes=None,
+                         executor='process'):
+        """ Stream the rows of the sheet as (rowNum, cells) tuples, like
+        rowsIter, parsing row-aligned chunks of the sheet document in
+        parallel, see xlsx.parallel. Rows are yielded in order. Sheets no
+        bigger than one chunk are read by rowsIter.
+        Arguments::
+
+            workers -- number of workers, the number of CPUs by default
+            chunkBytes -- uncompressed bytes of sheet xml per task
+            executor -- 'process', or 'thread' for workbooks held in
+                memory (threads share the interpreter lock, so they only
+                help with the inflating)
+
+        """
+        from xlsx.parallel import parallelRows, DEFAULT_CHUNK_BYTES
+
+        chunkBytes = chunkBytes or DEFAULT_CHUNK_BYTES
+        if self.workbook.domzip.size(self.path) <= chunkBytes:
+            return self.rowsIter()
+        if self.stats is None:
+            return parallelRows(self, workers, chunkBytes, executor)
+        counts = [0, 0, 0]
+        return timedRows(parallelRows(self, workers, chunkBytes, executor,
+                                      counts),
+                         self.stats, counts)
+
+    def _rowsIter(self, cellFactory, minRow=None, maxRow=None,
+                  columnFilter=None):
+        """ Stream the rows of the sheet as (rowNum, cells) tuples, where
+        every cell is built by cellFactory(row, column, value, formula).
+        Rows outside minRow/maxRow and cells whose column letters are
+        rejected by columnFilter are skipped before decoding.
+
+        """
+        return self.__rows(self.__parseRows, cellFactory, minRow, maxRow,
+                           columnFilter)
+
+    def __rows(self, generator, *args):
+        """ Start a row generator, which takes the cell value decoder as
+        its first argument, timed and counted if the sheet keeps stats
+
+        """
+        cellValue = self._valueDecoder()
+        if self.stats is None:
+            return generator(cellValue, *args)
+        counts = [0, 0, 0]
+        cellValue = countingDecoder(cellValue, counts,
+                                    self.workbook.backend.cellType)
+        return timedRows(generator(cellValue, *args), self.stats, counts)
+
+    def __parseRows(self, cellValue, cellFactory, minRow, maxRow,
+                    columnFilter):
+        sheetRows = self.workbook.backend.sheetRows
+        if sheetRows is not None:
+            return sheetRows(self, cellValue, cellFactory, minRow, maxRow,
+                             columnFilter)
+        return _decodeRows(self._rowNodes(), self.workbook, cellValue,
+                           cellFactory, minRow, maxRow, columnFilter)
+
+    def valuesIter(self, fill=None, asList=False):
+        """ Stream the rows of the sheet as (rowNum, values) tuples, without
+        building Cell objects. Values are placed by column position, so
+        values[0] is column A, and missing cells are set to `fill`.
+        Arguments::
+
+            fill -- value used for cells missing from a row
+            asList -- yield each row's values as a list instead of a tuple
+
+        """
+        return self.__rows(self.__parseValues, fill, asList)
+
+    def __parseValues(self, cellValue, fill, asList):
+        sheetRows = self.workbook.backend.sheetRows
+        if sheetRows is not None:
+            return self.__placeValues(
+                sheetRows(self, cellValue, _cellTuple, None, None, None),
+                fill, asList)
+        return self.__parseValueNodes(cellValue, fill, asList)
+
+    @staticmethod
+    def __placeValues(rows, fill, asList):
+        """ Place the values of (rowNum, [(column, value, formula), ...])
+        rows by column position
+
+        """
+        for rowNum, cells in rows:
+            values = []
+            for column, value, formula in cells:
+                position = columnIndex(column) - 1 if column else len(values)
+                if position > len(values):
+                    values.extend([fill] * (position - len(values)))
+                values.append(value)
+            yield rowNum, values if asList else tuple(values)
+
+    def __parseValueNodes(self, cellValue, fill, asList):
+        sharedStrings = self.workbook.sharedStrings
+        styleKinds = self.workbook.styleKinds
+        for rowNode in self._rowNodes():
             rowNum = int(rowNode.get("r"))
-            rowCells = []
+            values = []
             for columnNode in rowNode:
+                cellId = columnNode.get("r")
+                if cellId is None:
+                    position = len(values)
+                else:
+                    position = columnIndex(cellId.rstrip(_DIGITS)) - 1
+                if position > len(values):
+                    values.extend([fill] * (position - len(values)))
+                values.append(cellValue(columnNode, sharedStrings, styleKinds))
+            yield rowNum, values if asList else tuple(values)
+
+    def batchesIter(self, batchSize=10000, columnar=False, fill=None,
+                    width=None, reuse=False):
+        """ Stream the sheet in batches of up to batchSize rows, for bulk
+        loaders, as (rowNums, batch) tuples. rowNums is an array of the row
+        numbers in the batch, and batch either a list with a tuple of values
+        per row (placed by column position, as in valuesIter) or, with
+        columnar, a dict of column letters to lists of values.
+        Arguments::
+
+            batchSize -- maximum number of rows per batch
+            columnar -- build a list per column instead of a tuple per row
+            fill -- value used for cells missing from a row
+            width -- pad or cut every row to this many columns
+            reuse -- refill the same row number array and value lists for
+                every batch instead of allocating new ones, a batch is then
+                only valid until the next one is read
+
+        """
+        if batchSize < 1:
+            raise ValueError("batchSize must be positive: %r" % (batchSize,))
+        rowNums = array(str('i'))
+        rows = []
+        columns = []
+        for rowNum, values in self.valuesIter(fill, asList=True):
+            if width is not None:
+                if len(values) < width:
+                    values.extend([fill] * (width - len(values)))
+                else:
+                    del values[width:]
+            if columnar:
+                if len(values) > len(columns):
+                    count = len(rowNums)
+                    columns.extend([fill] * count for position
+                                   in range(len(columns), len(values)))
+                for position, column in enumerate(columns):
+                    column.append(values[position]
+                                  if position < len(values) else fill)
+            else:
+                rows.append(tuple(values))
+            rowNums.append(rowNum)
+            if len(rowNums) == batchSize:
+                yield self.__batch(rowNums, rows, columns, columnar)
+                if reuse:
+                    del rowNums[:]
+                    del rows[:]
+                    for column in columns:
+                        del column[:]
+                else:
+                    rowNums = array(str('i'))
+                    rows = []
+                    columns = []
+        if rowNums:
+            yield self.__batch(rowNums, rows, columns, columnar)
+
+    @staticmethod
+    def __batch(rowNums, rows, columns, columnar):
+        if columnar:
+            return rowNums, dict((columnLetters(position + 1), column)
+                                 for position, column in enumerate(columns))
+        return rowNums, rows
+
+    def columnArrays(self, firstRow=1):
+        """ Stream the sheet into typed columns, keyed by column letter, see
+        xlsx.columnar.Column. Position i of each column holds row
+        firstRow + i; positions without a cell are set in the column's mask.
+        Arguments::
+
+            firstRow -- first row to load, earlier rows are skipped
+
+        """
+        from xlsx.columnar import ColumnBuilder
+
+        sharedStrings = self.workbook.sharedStrings
+        styleKinds = self.workbook.styleKinds
+        builders = {}
+        length = 0
+        for rowNode in self._rowNodes():
+            rowNum = int(rowNode.get("r"))
+            if rowNum < firstRow:
+                continue
+            position = rowNum - firstRow
+            length = position + 1
+            for columnNode in rowNode:
+                valueNode = columnNode.find('{http://schemas.openxmlformats.org/spreadsheetml/2006/main}v')
                 colType = columnNode.get("t")
+                if valueNode is None and colType != "inlineStr":
+                    continue
                 cellId = columnNode.get("r")
+                colNum = cellId.rstrip(_DIGITS)
+                builder = builders.get(colNum)
+                if builder is None:
+                    builder = builders[colNum] = ColumnBuilder()
                 cellS = columnNode.get("s")
-                colNum = cellId[:len(cellId)-len(str(rowNum))]
-                formula = None
-                data = ''
-                try:
-                    if len(columnNode)>0 and columnNode[0] is not None and columnNode.find('{http://schemas.openxmlformats.org/spreadsheetml/2006/main}v') is not None:
-                        if colType == "s":
-                            stringIndex = columnNode[0].text
-                            data = self.workbook.sharedStrings[int(stringIndex)]
-                        #Built in date-formatted fields
-                        elif cellS and re.match("^[\d\.]+$", columnNode[0].text):
-                            if int(self.workbook.cellStyles[int(cellS)].get('numFmtId')) in range(14, 22+1):
-                                data = xldate_as_tuple(
-                                    float(columnNode[0].text),
-                                    datemode=0)
-                            elif (self.workbook.cellStyles[int(cellS)].get('numFmtId') in self.workbook.numFmts) \
-                                and is_date_format_string(self.workbook.numFmts[self.workbook.cellStyles[int(cellS)].get('numFmtId')]):
-                                data = xldate_as_tuple(
-                                    float(columnNode[0].text),
-                                    datemode=0)
-                            else:
-                                data = columnNode.find("{http://schemas.openxmlformats.org/spreadsheetml/2006/main}v").text
-                        else:
-                            data = columnNode.find("{http://schemas.openxmlformats.org/spreadsheetml/2006/main}v").text
-                    elif columnNode.find("{http://schemas.openxmlformats.org/spreadsheetml/2006/main}is") is not None:
-                        if colType == "inlineStr":
-                            data = columnNode[0][0].text
-
-                    if columnNode.find("{http://schemas.openxmlformats.org/spreadsheetml/2006/main}f") is not None:
-                        formula = columnNode.find("{http://schemas.openxmlformats.org/spreadsheetml/2006/main}f").text
-
-                except Exception:
-                    raise #pass
-                cell = Cell(rowNum, colNum, data, formula=formula)
-                rowCells.append(cell)
-            yield rowNum, rowCells
+                kind = styleKinds[int(cellS)] if cellS else STYLE_NUMBER
+                if colType == "b" or (colType is None or colType == "n") \
+                        and kind != STYLE_TEXT:
+                    builder.addNumber(position, valueNode.text,
+                                      kind == STYLE_DATE)
+                elif colType == "s":
+                    builder.addObject(position,
+                                      sharedStrings[int(valueNode.text)])
+                else:
+                    builder.addObject(position,
+                        self._cellValue(columnNode, sharedStrings, styleKinds))
+        return dict((colNum, builder.build(length))
+                    for colNum, builder in builders.items())
+
+    @property
+    def size(self):
+        """ Uncompressed size in bytes of the sheet document """
+        return self.workbook.domzip.size(self.path)
+
+    @cached_property
+    def dimension(self):
+        """ The used range of the sheet, such as 'A1:F5000' or 'B2' for a
+        single cell, None for a sheet without cells. It is read from the
+        `<dimension>` element in the header of the sheet document, so only
+        the start of the document is inflated. Sheets without one, or with
+        a single cell one that their size makes doubtful, are scanned, see
+        scanDimension. Excel gives empty sheets the dimension 'A1'.
+
+        """
+        handle = self.workbook.domzip.open(self.path, self.stats)
+        try:
+            data, sheetData = _readSheetHeader(handle)
+        finally:
+            handle.close()
+        if sheetData is not None:
+            data = data[:sheetData.start()]
+        match = _DIMENSION.search(data)
+        if match is not None:
+            ref = match.group(2).decode('ascii').upper()
+            if _CELL_RANGE.match(ref) and \
+                    (':' in ref or self.size <= _STALE_DIMENSION_SIZE):
+                return ref
+        return self.scanDimension()
+
+    def scanDimension(self):
+        """ The used range of the sheet like dimension, but found from the
+        `r` attributes of its rows and cells, ignoring the `<dimension>`
+        element. The whole sheet document is inflated and matched as raw
+        bytes, without parsing it.
+
+        """
+        handle = self.workbook.domzip.open(self.path, self.stats)
+        try:
+            bounds = _scanUsedRange(handle)
+        finally:
+            handle.close()
+        if bounds is None:
+            return None
+        minColumn, minRow, maxColumn, maxRow = bounds
+        first = '%s%d' % (columnLetters(minColumn), minRow)
+        last = '%s%d' % (columnLetters(maxColumn), maxRow)
+        return first if first == last else '%s:%s' % (first, last)
+
+    @property
+    def bounds(self):
+        """ The used range as (minColumn, minRow, maxColumn, maxRow), see
+        parseRange, or None for a sheet without cells
+
+        """
+        dimension = self.dimension
+        return parseRange(dimension) if dimension else None
+
+    @property
+    def rowCount(self):
+        """ Number of rows in the used range, including empty rows between
+        used ones
+
+        """
+        bounds = self.bounds
+        return bounds[3] - bounds[1] + 1 if bounds else 0
+
+    @property
+    def maxRow(self):
+        """ Number of the last row of the used range, 0 without cells """
+        bounds = self.bounds
+        return bounds[3] if bounds else 0
+
+    @property
+    def maxColumn(self):
+        """ Letters of the last column of the used range, None without
+        cells
+
+        """
+        bounds = self.bounds
+        return columnLetters(bounds[2]) if bounds else None
+
+    def index(self, columns, normalize=None, rows=False):
+        """ Hash index of the rows of the sheet by the values of a column,
+        or of several columns for composite keys: a dict mapping every key
+        to the list of row numbers holding it, in order, or with rows to
+        the lists of cells of those rows. Rows without any key value are
+        left out, missing values of a composite key are None. The index is
+        built in one streaming pass over the sheet (or from the loaded
+        cells), and kept for further calls with the same arguments. Usage::
+
+            rowNums = sheet.index(('A', 'C'), normalize=str.lower)
+            matches = rowNums.get(('key', 'other'), [])
+
+        Arguments::
+
+            columns -- column letters of the key; a string is one column
+                and gives keys that are plain values, a sequence gives
+                tuples of values
+            normalize -- function applied to every key value, for instance
+                to strip or fold case
+            rows -- map the keys to lists of cells instead of row numbers
+
+        """
+        cacheKey = (columns if isinstance(columns, string_types)
+                    else tuple(columns), normalize, rows)
+        index = self.__indexes.get(cacheKey)
+        if index is None:
+            index = self.__indexes[cacheKey] = \
+                self.__buildIndex(cacheKey[0], normalize, rows)
+        return index
+
+    def __buildIndex(self, columns, normalize, rows):
+        composite = not isinstance(columns, string_types)
+        keyColumns = tuple(column.upper() for column in columns) \
+            if composite else (columns.upper(),)
+        if self.loaded:
+            rowsIter = ((rowNum, [(cell.column, cell.value, cell)
+                                  for cell in cells])
+                        for rowNum, cells in self.rows().items())
+        elif rows:
+            rowsIter = ((rowNum, [(cell.column, cell.value, cell)
+                                  for cell in cells])
+                        for rowNum, cells in self.rowsIter())
+        else:
+            # Only the key cells are decoded
+            rowsIter = self._rowsIter(_cellTuple,
+                                      columnFilter=frozenset(
+                                          keyColumns).__contains__)
+        index = {}
+        for rowNum, cells in rowsIter:
+            values = dict((column, value) for column, value, extra in cells
+                          if value is not None and column in keyColumns)
+            if not values:
+                continue
+            if normalize is not None:
+                values = dict((column, normalize(value))
+                              for column, value in values.items())
+            if composite:
+                key = tuple(values.get(column) for column in keyColumns)
+            else:
+                key = values[keyColumns[0]]
+            entry = [cell for column, value, cell in cells] if rows \
+                else rowNum
+            matches = index.get(key)
+            if matches is None:
+                index[key] = [entry]
+            else:
+                matches.append(entry)
+        return index
 
     def __load(self):
-        rows = {}
-        columns = {}
-        for rowNum, row in self.rowsIter():
-            rows[rowNum] = row
-
-            for cell in row:
-                colNum = cell.column
-                if not colNum in columns:
-                    columns[colNum] = []
-                self.__cells[cell.id] = cell
-                columns[colNum].append(cell)
-        self.__rows = rows
-        self.__cols = columns
+        if self.stats is None:
+            self.__loadRows()
+        else:
+            with self.stats.timer(PHASE_LOAD):
+                self.__loadRows()
+
+    def __loadRows(self):
+        if not self._loadCached():
+            self._fill(self._rowsIter(_cellTuple))
+            self._storeCached()
+
+    def _loadCached(self):
+        """ Fill the sheet from the workbook's cache, returns whether it
+        was there
+
+        """
+        cacheEntry = self.workbook.cacheEntry
+        if cacheEntry is None:
+            return False
+        rows = cacheEntry.loadSheet(self.path, self.workbook.typedValues)
+        if rows is None:
+            return False
+        self._fill(rows)
+        return True
+
+    def _storeCached(self):
+        """ Store the loaded sheet in the workbook's cache, if any """
+        cacheEntry = self.workbook.cacheEntry
+        if cacheEntry is not None:
+            cacheEntry.storeSheet(self.path, self.__store.iterRows(),
+                                  self.workbook.typedValues)
+
+    def _fill(self, rowsIter):
+        """ Store the (rowNum, [(column, value, formula), ...]) tuples of
+        rowsIter as the loaded contents of the sheet
+
+        """
+        store = SheetStore(Cell, columnIndex, columnLetters,
+                           self.workbook.typedValues)
+        for rowNum, cells in rowsIter:
+            store.addRow(rowNum, cells)
+        store.finish()
+        self.__store = store
         self.loaded=True
 
     def rows(self):
+        """ Mapping of row numbers to the lists of cells in each row """
         if not self.loaded:
             self.__load()
-        return self.__rows
+        return RowsView(self.__store)
 
     def cols(self):
+        """ Mapping of column letters to the lists of cells in each column """
         if not self.loaded:
             self.__load()
-        return self.__cols
+        return ColsView(self.__store)
 
     def __getitem__(self, key):
+        if isinstance(key, int):
+            column, row = None, key
+        else:
+            (column, row) = self.addrPattern.match(key).groups()
+            column = column.upper()
+        if not self.loaded and column and row and not self.__lookedUp \
+                and self.workbook.cacheEntry is None:
+            # A first single cell is read without loading the whole sheet,
+            # the sheet is loaded for any further one, unless the whole
+            # sheet can come from (or should go to) the cache
+            self.__lookedUp = True
+            for rowNum, cells in self.rangeIter(columns=(column,),
+                                                minRow=int(row),
+                                                maxRow=int(row)):
+                return cells[0]
+            return None
         if not self.loaded:
             self.__load()
-        (column, row) = self.addrPattern.match(str(key)).groups()
         if column and row:
-            if not key in self.__cells:
-                return None
-            return self.__cells[key]
+            return self.__store.findCell(int(row), columnIndex(column))
         if column:
-            return self.__cols[key]
+            return self.cols()[column]
         if row:
-            return self.__rows[int(key)]
+            return self.rows()[int(row)]
 
     def __iter__(self):
         if not self.loaded:
             self.__load()
-        return self.__cells.__iter__()
+        return self.__store.iterIds()
+
+def _decodeRows(rowNodes, tables, cellValue, cellFactory, minRow=None,
+                maxRow=None, columnFilter=None):
+    """ Decode `<row>` nodes to (rowNum, cells) tuples, see Sheet._rowsIter.
+    The sharedStrings and styleKinds attributes of tables (the Workbook, or
+    the state of a worker) are looked up when the first row is read.
+
+    """
+    sharedStrings = tables.sharedStrings
+    styleKinds = tables.styleKinds
+    for rowNode in rowNodes:
+        rowNum = int(rowNode.get("r"))
+        if minRow is not None and rowNum < minRow:
+            continue
+        if maxRow is not None and rowNum > maxRow:
+            break
+        rowCells = []
+        for columnNode in rowNode:
+            cellId = columnNode.get("r")
+            colNum = cellId.rstrip(_DIGITS)
+            if columnFilter is not None and not columnFilter(colNum):
+                continue
+            data = cellValue(columnNode, sharedStrings, styleKinds)
+            formula = None
+            formulaNode = columnNode.find("{http://schemas.openxmlformats.org/spreadsheetml/2006/main}f")
+            if formulaNode is not None:
+                formula = formulaNode.text
+            rowCells.append(cellFactory(rowNum, colNum, data, formula))
+        yield rowNum, rowCells
+
+def _startPool(executor, workers, initializer, initargs):
+    """ Start a pool of the executor kind ('thread' or 'process') whose
+    workers run initializer(*initargs) first. Returns the pool and the
+    arguments to append to every task: the initargs themselves where the
+    pool takes no initializer (before Python 3.7), so that the task can
+    call the initializer.
+
+    """
+    from concurrent import futures
+
+    if executor == 'process':
+        poolClass = futures.ProcessPoolExecutor
+    elif executor == 'thread':
+        poolClass = futures.ThreadPoolExecutor
+    else:
+        raise ValueError("Unknown executor kind %r" % (executor,))
+    try:
+        return poolClass(max_workers=workers, initializer=initializer,
+                         initargs=initargs), ()
+    except TypeError: # No initializer before Python 3.7
+        return poolClass(max_workers=workers), initargs
+
+# State of a loadSheets worker, set up once per thread or process
+_sheetWorker = threading.local()
+
+def _initSheetWorker(source, sharedStrings, styleKinds, typedValues,
+                     backend):
+    workbook = Workbook(source, typedValues=typedValues, backend=backend)
+    workbook.sharedStrings = sharedStrings
+    workbook.styleKinds = styleKinds
+    _sheetWorker.workbook = workbook
+
+def _cellTuple(row, column, value, formula):
+    return (column, value, formula)
+
+def _readSheetRows(sheetId, path, *initargs):
+    """ Read a sheet in a loadSheets worker as (rowNum, [(column, value,
+    formula), ...]) tuples. Workers without an initializer get its
+    arguments with every task.
+
+    """
+    if initargs:
+        _initSheetWorker(*initargs)
+    sheet = Sheet(_sheetWorker.workbook, sheetId, None, path)
+    return list(sheet._rowsIter(_cellTuple))
 
 
 class Cell(UnicodeMixin):
 
-    def __init__(self, row, column, value, formula=None):
+    __slots__ = ('row', 'column', 'value', 'formula', 'columnNumber')
+
+    def __init__(self, row, column, value, formula=None, columnNumber=None):
         self.row = int(row)
         self.column = column
         self.value = value
         self.formula = formula
-        self.id = "%s%s"%(column, row)
+        self.columnNumber = columnIndex(column) if columnNumber is None \
+            else columnNumber
+
+    @property
+    def id(self):
+        return "%s%s"%(self.column, self.row)
 
     def __cmp__(self, other):
-        if other.column == self.column:
-            return self.row - other.row
-        else:
-            if self.column < other.column:
-                return -1
-            elif self.column > other.column:
-                return 1
-            else:
-                return 0
+        mine = (self.columnNumber, self.row)
+        theirs = (other.columnNumber, other.row)
+        return (mine > theirs) - (mine < theirs)
 
     def __lt__(self, other):
-        return self.__cmp__(other) == -1
+        return (self.columnNumber, self.row) < (other.columnNumber, other.row)
 
     def __gt__(self, other):
-        return self.__cmp__(other) == 1
+        return (self.columnNumber, self.row) > (other.columnNumber, other.row)
 
     def __eq__(self, other):
-        return self.__cmp__(other) == 0
+        return (self.columnNumber, self.row) == (other.columnNumber, other.row)
 
     def __ne__(self, other):
-        return self.__cmp__(other) != 0
+        return (self.columnNumber, self.row) != (other.columnNumber, other.row)
 
     def __le__(self, other):
-        return self.__cmp__(other) != 1
+        return (self.columnNumber, self.row) <= (other.columnNumber, other.row)
 
     def __ge__(self, other):
-        return self.__cmp__(other) != -1
+        return (self.columnNumber, self.row) >= (other.columnNumber, other.row)
 
     def __unicode__(self):
         return "<Cell [%s] : \"%s\" (%s)>" % (self.id, self.value,
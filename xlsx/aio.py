@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+""" asyncio front end of the reader (Python 3.5+).
+
+Workbook and Sheet do all the work: they run on a bounded thread pool, and
+rows are handed back to the event loop in batches, so that parsing a big
+upload never blocks other requests. Usage::
+
+    workbook = await openWorkbook(upload)
+    async with workbook[1].rowsIter(batchSize=500) as rows:
+        async for rowNum, cells in rows:
+            ...
+
+Row iterators read one batch ahead of their consumer and no further, and
+closing (or cancelling) one stops the parser as soon as the batch in
+progress is done.
+
+"""
+
+import asyncio
+import threading
+from itertools import islice
+from collections import deque
+from concurrent import futures
+
+from xlsx import Workbook
+
+# Threads of the pool used when no executor is given
+DEFAULT_WORKERS = 4
+
+_executor = None
+_executorLock = threading.Lock()
+
+
+def defaultExecutor():
+    """ The shared thread pool, created on first use """
+    global _executor
+    with _executorLock:
+        if _executor is None:
+            _executor = futures.ThreadPoolExecutor(
+                max_workers=DEFAULT_WORKERS)
+        return _executor
+
+
+async def openWorkbook(filename, executor=None, **kwargs):
+    """ Open a workbook without blocking the event loop.
+    Arguments::
+
+        filename -- filepath, file-like object or buffer, see Workbook
+        executor -- concurrent.futures executor doing the blocking work,
+            a shared pool of DEFAULT_WORKERS threads by default
+        kwargs -- other Workbook arguments
+
+    Returns an AsyncWorkbook.
+
+    """
+    executor = executor or defaultExecutor()
+    workbook = await asyncio.wrap_future(
+        executor.submit(Workbook, filename, **kwargs))
+    return AsyncWorkbook(workbook, executor)
+
+
+class AsyncWorkbook(object):
+    """ A Workbook whose sheets are read through an executor """
+
+    def __init__(self, workbook, executor=None):
+        self.workbook = workbook
+        self.executor = executor or defaultExecutor()
+
+    def keys(self):
+        return self.workbook.keys()
+
+    def close(self):
+        self.workbook.close()
+
+    def __len__(self):
+        return len(self.workbook)
+
+    def __iter__(self):
+        for sheet in self.workbook:
+            yield AsyncSheet(sheet, self.executor)
+
+    def __getitem__(self, key):
+        return AsyncSheet(self.workbook[key], self.executor)
+
+    def __contains__(self, key):
+        return key in self.workbook
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+
+class AsyncSheet(object):
+    """ A Sheet read through an executor """
+
+    def __init__(self, sheet, executor=None):
+        self.sheet = sheet
+        self.executor = executor or defaultExecutor()
+
+    @property
+    def id(self):
+        return self.sheet.id
+
+    @property
+    def name(self):
+        return self.sheet.name
+
+    def rowsIter(self, batchSize=1000):
+        """ Async iterator of the (rowNum, cells) tuples of Sheet.rowsIter,
+        parsed batchSize rows at a time
+
+        """
+        return AsyncRows(self.sheet.rowsIter(), self.executor, batchSize)
+
+    def rangeIter(self, ref=None, columns=None, minRow=None, maxRow=None,
+                  batchSize=1000):
+        """ Async iterator of the (rowNum, cells) tuples of Sheet.rangeIter,
+        parsed batchSize rows at a time
+
+        """
+        return AsyncRows(self.sheet.rangeIter(ref, columns, minRow, maxRow),
+                         self.executor, batchSize)
+
+    def valuesIter(self, fill=None, asList=False, batchSize=1000):
+        """ Async iterator of the (rowNum, values) tuples of
+        Sheet.valuesIter, parsed batchSize rows at a time
+
+        """
+        return AsyncRows(self.sheet.valuesIter(fill, asList), self.executor,
+                         batchSize)
+
+    async def rows(self):
+        """ Load the sheet, see Sheet.rows """
+        return await asyncio.wrap_future(
+            self.executor.submit(self.sheet.rows))
+
+    async def cols(self):
+        """ Load the sheet, see Sheet.cols """
+        return await asyncio.wrap_future(
+            self.executor.submit(self.sheet.cols))
+
+
+class AsyncRows(object):
+    """ Async iterator over a blocking iterator, advanced in batches on an
+    executor. At most one batch is being read while the consumer works
+    through the previous one; the blocking iterator is never advanced by
+    two threads at once.
+
+    """
+
+    def __init__(self, rows, executor=None, batchSize=1000):
+        """ Wrap a blocking iterator.
+        Arguments::
+
+            rows -- iterator (usually a generator) of rows
+            executor -- concurrent.futures executor to advance it on
+            batchSize -- number of rows read per executor call
+
+        """
+        if batchSize < 1:
+            raise ValueError("batchSize must be positive: %r" % (batchSize,))
+        self.rows = rows
+        self.executor = executor or defaultExecutor()
+        self.batchSize = batchSize
+        self.__batch = deque()
+        self.__pending = None
+        self.__exhausted = False
+        self.__closed = False
+
+    def __readBatch(self):
+        return list(islice(self.rows, self.batchSize))
+
+    def __fetch(self):
+        if self.__pending is None and not self.__exhausted:
+            self.__pending = self.executor.submit(self.__readBatch)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self.__batch:
+            if self.__closed or (self.__exhausted and self.__pending is None):
+                raise StopAsyncIteration
+            self.__fetch()
+            pending = self.__pending
+            try:
+                batch = await asyncio.wrap_future(pending)
+            except asyncio.CancelledError:
+                self.close()
+                raise
+            except Exception:
+                self.__pending = None
+                self.__exhausted = True
+                raise
+            self.__pending = None
+            if len(batch) < self.batchSize:
+                self.__exhausted = True
+            self.__batch.extend(batch)
+            # Read ahead while the consumer works through this batch
+            self.__fetch()
+        return self.__batch.popleft()
+
+    def close(self):
+        """ Stop reading. A batch being read is finished first, then the
+        blocking iterator is closed on the executor.
+
+        """
+        if self.__closed:
+            return
+        self.__closed = True
+        self.__batch.clear()
+        close = getattr(self.rows, 'close', None)
+        if close is None:
+            return
+        if self.__pending is not None:
+            self.__pending.add_done_callback(lambda future: close())
+        else:
+            self.executor.submit(close)
+
+    async def aclose(self):
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+""" XML parser backends of the reader.
+
+A backend parses the parts of a workbook for the sheet, shared string and
+style readers. Pick one by name when opening a workbook::
+
+    book = Workbook('big.xlsx', backend='expat')
+
+'etree' (the default)
+    ElementTree: sheets are streamed as `<row>` elements, small parts
+    (the workbook, relationships and styles) are parsed into trees and
+    shared strings are decoded from parser events, see SharedStrings.parse.
+'expat'
+    Sheets are decoded straight from the start, end and character events
+    of xml.parsers.expat, without building any element. The other parts
+    are read as with 'etree'. columnArrays and parallelRowsIter keep
+    parsing row elements with ElementTree.
+'lxml'
+    lxml.etree in place of ElementTree for every part, when lxml is
+    installed.
+
+All backends give the same values; the conformance tests in
+xlsx/tests/test_backends.py run the fixtures through each of them.
+
+"""
+
+from __future__ import unicode_literals
+
+from operator import itemgetter
+from xml.parsers import expat
+
+from xlsx import ET, _MAIN_NS, _DIGITS, STYLE_DATE, STYLE_TEXT, Sheet, \
+    SharedStrings, ErrorValue, numberPattern, _number
+from xlsx.xldate import xldate_as_tuple, xldate_as_datetime, XLDateError
+
+try:
+    from lxml import etree as lxmlEtree
+except ImportError:
+    lxmlEtree = None
+
+# Bytes of sheet xml handed to expat at a time
+_READ_SIZE = 1 << 16
+
+
+class Backend(object):
+    """ Parses the parts of a workbook. Subclasses set etree, and may
+    decode sheets from parser events by implementing sheetRows.
+
+    """
+
+    # Name to pick the backend by, see getBackend
+    name = None
+
+    # ElementTree compatible module parsing the parts read as trees
+    etree = None
+
+    # sheetRows(sheet, cellValue, cellFactory, minRow, maxRow,
+    # columnFilter), streaming the rows of a sheet as Sheet._rowsIter does,
+    # or None to decode the `<row>` elements of DomZip.iterparse
+    sheetRows = None
+
+    def valueDecoder(self, typedValues):
+        """ The cell value decoder, see Sheet._cellValue and
+        Sheet._typedCellValue
+
+        """
+        if typedValues:
+            return Sheet._typedCellValue
+        return Sheet._cellValue
+
+    @staticmethod
+    def cellType(cell):
+        """ The `t` attribute of a cell as given to the value decoder """
+        return cell.get("t")
+
+    def readSharedStrings(self, handle, size):
+        """ Decode a `sharedStrings.xml` document from a file object of
+        size uncompressed bytes
+
+        """
+        return SharedStrings(self.etree.parse(handle).getroot())
+
+
+class EtreeBackend(Backend):
+    """ ElementTree, with the shared strings decoded from parser events """
+
+    name = 'etree'
+    etree = ET
+
+    def readSharedStrings(self, handle, size):
+        return SharedStrings.parse(handle, size)
+
+
+class LxmlBackend(Backend):
+    """ lxml.etree for every part """
+
+    name = 'lxml'
+
+    def __init__(self):
+        if lxmlEtree is None:
+            raise ImportError("The lxml backend needs lxml installed")
+        self.etree = lxmlEtree
+
+
+class ExpatBackend(EtreeBackend):
+    """ Sheets decoded from expat events, with no element objects. Cells
+    reach the value decoders as [t, s, hasValue, value, hasInline, inline,
+    formula] lists: the `t` and `s` attributes, whether there is a `<v>`
+    element and its text, whether there is an `<is>` element and the text
+    of its first child, and the text of the `<f>` element.
+
+    """
+
+    name = 'expat'
+
+    cellType = staticmethod(itemgetter(0))
+
+    def valueDecoder(self, typedValues):
+        if typedValues:
+            return _typedCellValue
+        return _cellValue
+
+    def sheetRows(self, sheet, cellValue, cellFactory, minRow=None,
+                  maxRow=None, columnFilter=None):
+        handle = sheet.workbook.domzip.open(sheet.path, sheet.stats)
+        try:
+            for row in _expatRows(handle, sheet.workbook, cellValue,
+                                  cellFactory, minRow, maxRow,
+                                  columnFilter):
+                yield row
+        finally:
+            handle.close()
+
+
+# Backend classes by name
+BACKENDS = {
+    'etree': EtreeBackend,
+    'expat': ExpatBackend,
+    'lxml': LxmlBackend,
+}
+
+
+def availableBackends():
+    """ Names of the backends that can be used here """
+    return sorted(name for name in BACKENDS
+                  if name != 'lxml' or lxmlEtree is not None)
+
+
+def getBackend(backend):
+    """ The Backend for a name, or backend itself if it is one """
+    if isinstance(backend, Backend):
+        return backend
+    try:
+        return BACKENDS[backend]()
+    except KeyError:
+        raise ValueError("Unknown xml backend %r, choose from %s"
+                         % (backend, ', '.join(sorted(BACKENDS))))
+
+
+def _cellValue(cell, sharedStrings, styleKinds):
+    """ Sheet._cellValue for the cell lists of ExpatBackend """
+    colType, cellS, hasValue, text, hasInline, inline, formula = cell
+    if hasValue:
+        if colType == "s":
+            return sharedStrings[int(text)]
+        if cellS and styleKinds[int(cellS)] == STYLE_DATE \
+                and numberPattern.match(text):
+            return xldate_as_tuple(float(text), datemode=0)
+        return text
+    elif colType == "inlineStr" and hasInline:
+        return inline
+    return ''
+
+
+def _typedCellValue(cell, sharedStrings, styleKinds):
+    """ Sheet._typedCellValue for the cell lists of ExpatBackend """
+    colType, cellS, hasValue, text, hasInline, inline, formula = cell
+    if not hasValue:
+        if colType == "inlineStr" and hasInline:
+            return inline
+        return None
+    if text is None:
+        return None
+    if colType is None or colType == "n":
+        if cellS:
+            kind = styleKinds[int(cellS)]
+            if kind == STYLE_DATE:
+                try:
+                    return xldate_as_datetime(float(text), datemode=0)
+                except XLDateError:
+                    pass
+            elif kind == STYLE_TEXT:
+                return text
+        return _number(text)
+    if colType == "s":
+        return sharedStrings[int(text)]
+    if colType == "b":
+        return text == "1"
+    if colType == "e":
+        return ErrorValue(text)
+    return text
+
+
+# Fields of the cell lists ExpatBackend hands to its value decoders
+_TYPE, _STYLE, _HAS_VALUE, _VALUE, _HAS_INLINE, _INLINE, _FORMULA = range(7)
+
+# Tag names as reported by expat with '}' as namespace separator
+_ROW_TAG = _MAIN_NS + '}row'
+_CELL_TAG = _MAIN_NS + '}c'
+_VALUE_TAG = _MAIN_NS + '}v'
+_FORMULA_TAG = _MAIN_NS + '}f'
+_INLINE_TAG = _MAIN_NS + '}is'
+_SHEET_DATA_TAG = _MAIN_NS + '}sheetData'
+
+
+class _SheetHandler(object):
+    """ expat handlers decoding the rows of a sheet document into done, see
+    _expatRows
+
+    """
+
+    __slots__ = ('cellValue', 'cellFactory', 'minRow', 'maxRow',
+                 'columnFilter', 'sharedStrings', 'styleKinds', 'done',
+                 'stop', 'rowNum', 'cells', 'column', 'cell', 'field',
+                 'fieldTag', 'text', 'inline')
+
+    def __init__(self, tables, cellValue, cellFactory, minRow, maxRow,
+                 columnFilter):
+        self.cellValue = cellValue
+        self.cellFactory = cellFactory
+        self.minRow = minRow
+        self.maxRow = maxRow
+        self.columnFilter = columnFilter
+        self.sharedStrings = tables.sharedStrings
+        self.styleKinds = tables.styleKinds
+        # Rows completed, and whether parsing can stop
+        self.done = []
+        self.stop = False
+        # The row being read, None when it is skipped
+        self.rowNum = None
+        self.cells = None
+        # The cell being read, None outside kept cells
+        self.column = None
+        self.cell = None
+        # Field of the cell whose text is being collected (-1 for none),
+        # the tag it comes from and the text so far
+        self.field = -1
+        self.fieldTag = None
+        self.text = None
+        # 1 inside an <is> before its first child
+        self.inline = 0
+
+    def start(self, name, attrs):
+        if self.field >= 0:
+            # Only the text before a first child counts, as with .text
+            self.cell[self.field] = self.text
+            self.field = -1
+        cell = self.cell
+        if cell is not None:
+            if name == _VALUE_TAG:
+                cell[_HAS_VALUE] = True
+                self.collect(_VALUE, name)
+            elif name == _FORMULA_TAG:
+                if cell[_FORMULA] is None:
+                    self.collect(_FORMULA, name)
+            elif name == _INLINE_TAG:
+                cell[_HAS_INLINE] = True
+                self.inline = 1
+            elif self.inline == 1:
+                self.inline = 2
+                self.collect(_INLINE, name)
+        elif name == _CELL_TAG:
+            if self.cells is None:
+                return
+            column = attrs.get("r", "").rstrip(_DIGITS)
+            if self.columnFilter is not None and \
+                    not self.columnFilter(column):
+                return
+            self.column = column
+            self.cell = [attrs.get("t"), attrs.get("s"), False, None, False,
+                         None, None]
+            self.inline = 0
+        elif name == _ROW_TAG:
+            rowNum = int(attrs["r"])
+            self.cells = None
+            if self.maxRow is not None and rowNum > self.maxRow:
+                self.stop = True
+            elif self.minRow is None or rowNum >= self.minRow:
+                self.rowNum = rowNum
+                self.cells = []
+
+    def collect(self, field, name):
+        self.field = field
+        self.fieldTag = name
+        self.text = None
+
+    def end(self, name):
+        if self.field >= 0 and name == self.fieldTag:
+            self.cell[self.field] = self.text
+            self.field = -1
+        if name == _CELL_TAG:
+            cell = self.cell
+            if cell is not None:
+                self.cells.append(self.cellFactory(
+                    self.rowNum, self.column,
+                    self.cellValue(cell, self.sharedStrings, self.styleKinds),
+                    cell[_FORMULA]))
+                self.cell = None
+        elif name == _ROW_TAG:
+            if self.cells is not None:
+                self.done.append((self.rowNum, self.cells))
+                self.cells = None
+        elif name == _INLINE_TAG:
+            self.inline = 2
+        elif name == _SHEET_DATA_TAG:
+            self.stop = True
+
+    def characters(self, data):
+        if self.field >= 0:
+            self.text = data if self.text is None else self.text + data
+
+
+def _expatRows(handle, tables, cellValue, cellFactory, minRow, maxRow,
+               columnFilter):
+    """ Decode the rows of a sheet document read from handle as
+    (rowNum, cells) tuples, see Sheet._rowsIter. Parsing stops at the end
+    of `<sheetData>` or after maxRow.
+
+    """
+    handler = _SheetHandler(tables, cellValue, cellFactory, minRow, maxRow,
+                            columnFilter)
+    parser = expat.ParserCreate(namespace_separator='}')
+    parser.buffer_text = True
+    parser.buffer_size = _READ_SIZE
+    parser.StartElementHandler = handler.start
+    parser.EndElementHandler = handler.end
+    parser.CharacterDataHandler = handler.characters
+    read = handle.read
+    done = handler.done
+    while not handler.stop:
+        data = read(_READ_SIZE)
+        parser.Parse(data, not data)
+        for row in done:
+            yield row
+        del done[:]
+        if not data:
+            break
@@ -0,0 +1,453 @@
+# -*- coding: utf-8 -*-
+""" Persistent on-disk cache of parsed workbooks.
+
+Decoded sheets, shared strings and resolved styles are stored in a compact
+binary columnar format that is memory mapped when read back, so reopening
+a workbook that is already in the cache skips zip inflation and xml
+parsing. Usage::
+
+    cache = WorkbookCache('/var/cache/xlsx', maxBytes=2 << 30)
+    book = Workbook('reference.xlsx', cache=cache)
+
+Entries are keyed by the library version and either the file's path, size
+and modification time or (with hashContents) a hash of its contents. The
+cache directory is kept below maxBytes by evicting the least recently used
+entries.
+
+"""
+
+from __future__ import unicode_literals
+
+import os
+import sys
+import json
+import mmap
+import shutil
+import struct
+import hashlib
+import datetime
+import tempfile
+from array import array
+
+import xlsx
+from xlsx.timemachine import string_types, buffer_types
+
+MAGIC = b'XLSXCACHE1\n'
+
+# Kinds of cached values. Integers, floats, booleans, datetimes and error
+# codes only come from workbooks opened with typedValues.
+VALUE_TEXT = 0
+VALUE_NONE = 1
+VALUE_DATE = 2
+VALUE_INT = 3
+VALUE_FLOAT = 4
+VALUE_BOOL = 5
+VALUE_DATETIME = 6
+VALUE_ERROR = 7
+
+NO_FORMULA = -1
+
+
+class CachedArrays(object):
+    """ Named typed arrays stored in one file: a json header with the
+    typecode, offset and length of every array, then the arrays themselves.
+    Reading memory maps the file and casts views into it, nothing is
+    copied.
+
+    """
+
+    def __init__(self, path):
+        self.__file = open(path, 'rb')
+        try:
+            self.__mmap = mmap.mmap(self.__file.fileno(), 0,
+                                    access=mmap.ACCESS_READ)
+        except ValueError: # Empty file
+            self.__file.close()
+            raise
+        view = memoryview(self.__mmap)
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError("Not a workbook cache file: %s" % path)
+        headerLength = struct.unpack(
+            '<Q', bytes(view[len(MAGIC):len(MAGIC) + 8]))[0]
+        start = len(MAGIC) + 8
+        self.header = json.loads(
+            bytes(view[start:start + headerLength]).decode('utf-8'))
+        if self.header['byteorder'] != sys.byteorder:
+            raise ValueError("Cache file written on another platform")
+        self.arrays = {}
+        for name, (typecode, offset, count) in self.header['arrays'].items():
+            itemsize = array(str(typecode)).itemsize
+            self.arrays[name] = view[offset:offset + count * itemsize] \
+                .cast(str(typecode))
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    @staticmethod
+    def write(path, arrays, **header):
+        """ Atomically write typed arrays (by name) and extra header values """
+        header['byteorder'] = sys.byteorder
+        header['arrays'] = layout = {}
+        # The header size depends on the offsets in it; lay the arrays out
+        # after a generously sized guess and pad the header to it
+        offset = 0
+        for name, values in sorted(arrays.items()):
+            layout[name] = [values.typecode, offset, len(values)]
+            offset += len(values) * values.itemsize
+            offset += -offset % 8
+        headerSize = len(json.dumps(header)) + 64 * len(arrays) + 64
+        headerSize += -headerSize % 8
+        base = len(MAGIC) + 8 + headerSize
+        for entry in layout.values():
+            entry[1] += base
+        headerBytes = json.dumps(header).encode('utf-8')
+        headerBytes += b' ' * (headerSize - len(headerBytes))
+
+        handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(handle, 'wb') as output:
+                output.write(MAGIC)
+                output.write(struct.pack('<Q', len(headerBytes)))
+                output.write(headerBytes)
+                for name, values in sorted(arrays.items()):
+                    output.seek(layout[name][1])
+                    values.tofile(output)
+            _replace(temporary, path)
+        except Exception:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+
+def _replace(source, target):
+    """ Rename over an existing file, also on Windows """
+    if hasattr(os, 'replace'):
+        os.replace(source, target)
+    else:
+        if os.path.exists(target):
+            os.remove(target)
+        os.rename(source, target)
+
+
+class TextTable(object):
+    """ Collects distinct strings while writing, as ids into a utf-8 blob """
+
+    def __init__(self):
+        self.ids = {}
+        self.blob = bytearray()
+        self.offsets = array(str('q'), [0])
+
+    def add(self, text):
+        id = self.ids.get(text)
+        if id is None:
+            id = self.ids[text] = len(self.offsets) - 1
+            self.blob.extend(text.encode('utf-8'))
+            self.offsets.append(len(self.blob))
+        return id
+
+    def arrays(self):
+        return {'textBlob': array(str('B'), bytes(self.blob)),
+                'textOffsets': self.offsets}
+
+
+class CachedTexts(object):
+    """ Strings of a TextTable, decoded from the memory mapped file """
+
+    def __init__(self, arrays):
+        self.blob = arrays['textBlob']
+        self.offsets = arrays['textOffsets']
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, id):
+        return self.blob[self.offsets[id]:self.offsets[id + 1]] \
+            .tobytes().decode('utf-8')
+
+
+class CachedStrings(object):
+    """ Shared strings table read back from the cache """
+
+    def __init__(self, arrays):
+        self.__texts = CachedTexts(arrays)
+        self.__kinds = arrays['kinds']
+        self.__values = arrays['values']
+
+    def __len__(self):
+        return len(self.__kinds)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __getitem__(self, index):
+        if self.__kinds[index] == VALUE_NONE:
+            return None
+        return self.__texts[self.__values[index]]
+
+
+def _writeValue(value, texts, kinds, values, dates, numbers=None):
+    if value is None:
+        kinds.append(VALUE_NONE)
+        values.append(0)
+    elif isinstance(value, tuple):
+        kinds.append(VALUE_DATE)
+        values.append(len(dates) // 6)
+        dates.extend(value)
+    elif isinstance(value, bool):
+        kinds.append(VALUE_BOOL)
+        values.append(int(value))
+    elif isinstance(value, int):
+        kinds.append(VALUE_INT)
+        values.append(len(numbers['ints']))
+        numbers['ints'].append(value)
+    elif isinstance(value, float):
+        kinds.append(VALUE_FLOAT)
+        values.append(len(numbers['floats']))
+        numbers['floats'].append(value)
+    elif isinstance(value, datetime.datetime):
+        kinds.append(VALUE_DATETIME)
+        values.append(len(dates) // 6)
+        dates.extend(value.timetuple()[:6])
+    elif isinstance(value, xlsx.ErrorValue):
+        kinds.append(VALUE_ERROR)
+        values.append(texts.add(value))
+    else:
+        kinds.append(VALUE_TEXT)
+        values.append(texts.add(value))
+
+
+class CacheEntry(object):
+    """ The cached parts of one workbook """
+
+    def __init__(self, cache, directory):
+        self.cache = cache
+        self.directory = directory
+
+    def __path(self, name):
+        return os.path.join(self.directory, name)
+
+    def __sheetName(self, sheetPath, typed):
+        return 'sheet-%s%s.bin' % (
+            hashlib.sha1(sheetPath.encode('utf-8')).hexdigest(),
+            '-typed' if typed else '')
+
+    def __open(self, name):
+        path = self.__path(name)
+        if not os.path.exists(path):
+            return None
+        try:
+            arrays = CachedArrays(path)
+        except (ValueError, KeyError, EnvironmentError):
+            return None
+        self.cache.touch(self.directory)
+        return arrays
+
+    def __store(self, name, arrays, **header):
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        CachedArrays.write(self.__path(name), arrays, **header)
+        self.cache.touch(self.directory)
+        self.cache.evict(keep=self.directory)
+
+    def loadStyleKinds(self):
+        arrays = self.__open('styles.bin')
+        return None if arrays is None else array(str('B'), arrays['kinds'])
+
+    def storeStyleKinds(self, styleKinds):
+        self.__store('styles.bin', {'kinds': array(str('B'), styleKinds)})
+
+    def loadStrings(self):
+        """ Returns the cached shared strings, None if they are not cached,
+        or False if the workbook has no shared strings
+
+        """
+        arrays = self.__open('strings.bin')
+        if arrays is None:
+            return None
+        if arrays.header.get('missing'):
+            return False
+        return CachedStrings(arrays)
+
+    def storeStrings(self, strings):
+        if strings is None:
+            self.__store('strings.bin', {}, missing=True)
+            return
+        texts = TextTable()
+        kinds = array(str('B'))
+        values = array(str('i'))
+        for text in strings:
+            _writeValue(text, texts, kinds, values, None)
+        arrays = texts.arrays()
+        arrays.update(kinds=kinds, values=values)
+        self.__store('strings.bin', arrays)
+
+    def loadSheet(self, sheetPath, typed=False):
+        """ Returns the cached (rowNum, [(column, value, formula), ...])
+        tuples of a sheet, or None if the sheet is not cached. Sheets read
+        with typed values are cached apart.
+
+        """
+        arrays = self.__open(self.__sheetName(sheetPath, typed))
+        if arrays is None:
+            return None
+        return self.__sheetRows(arrays)
+
+    def __sheetRows(self, arrays):
+        texts = CachedTexts(arrays)
+        rowNums = arrays['rows']
+        rowLengths = arrays['rowLengths']
+        columns = arrays['columns']
+        kinds = arrays['kinds']
+        values = arrays['values']
+        formulas = arrays['formulas']
+        dates = arrays['dates']
+        ints = arrays.arrays.get('ints')
+        floats = arrays.arrays.get('floats')
+        columnNames = {}
+        position = 0
+        for rowNum, rowLength in zip(rowNums, rowLengths):
+            cells = []
+            for index in range(position, position + rowLength):
+                column = columns[index]
+                if column not in columnNames:
+                    columnNames[column] = texts[column]
+                kind = kinds[index]
+                if kind == VALUE_TEXT:
+                    value = texts[values[index]]
+                elif kind == VALUE_DATE:
+                    start = values[index] * 6
+                    value = tuple(dates[start:start + 6])
+                elif kind == VALUE_INT:
+                    value = ints[values[index]]
+                elif kind == VALUE_FLOAT:
+                    value = floats[values[index]]
+                elif kind == VALUE_BOOL:
+                    value = bool(values[index])
+                elif kind == VALUE_DATETIME:
+                    start = values[index] * 6
+                    value = datetime.datetime(*dates[start:start + 6])
+                elif kind == VALUE_ERROR:
+                    value = xlsx.ErrorValue(texts[values[index]])
+                else:
+                    value = None
+                formula = formulas[index]
+                cells.append((columnNames[column], value,
+                              None if formula == NO_FORMULA
+                              else texts[formula]))
+            position += rowLength
+            yield rowNum, cells
+
+    def storeSheet(self, sheetPath, rows, typed=False):
+        """ Cache the (rowNum, [(column, value, formula), ...]) tuples of a
+        sheet
+
+        """
+        texts = TextTable()
+        rowNums = array(str('i'))
+        rowLengths = array(str('i'))
+        columns = array(str('i'))
+        kinds = array(str('B'))
+        values = array(str('i'))
+        formulas = array(str('i'))
+        dates = array(str('i'))
+        numbers = {'ints': array(str('q')), 'floats': array(str('d'))}
+        for rowNum, cells in rows:
+            rowNums.append(rowNum)
+            rowLengths.append(len(cells))
+            for column, value, formula in cells:
+                columns.append(texts.add(column))
+                _writeValue(value, texts, kinds, values, dates, numbers)
+                formulas.append(NO_FORMULA if formula is None
+                                else texts.add(formula))
+        arrays = texts.arrays()
+        arrays.update(rows=rowNums, rowLengths=rowLengths, columns=columns,
+                      kinds=kinds, values=values, formulas=formulas,
+                      dates=dates, **numbers)
+        self.__store(self.__sheetName(sheetPath, typed), arrays)
+
+
+class WorkbookCache(object):
+    """ Directory of cached workbooks, see the module documentation """
+
+    def __init__(self, directory, maxBytes=1 << 30, hashContents=False):
+        """ Open (or create) a cache directory.
+        Arguments::
+
+            directory -- where the cache lives
+            maxBytes -- size limit of the cache directory
+            hashContents -- key files by a hash of their contents instead
+                of their path, size and modification time
+
+        """
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.hashContents = hashContents
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def key(self, source):
+        """ Cache key of a workbook path, file object or buffer """
+        digest = hashlib.sha1(('py-xlsx %s\n' % xlsx.__version__)
+                              .encode('utf-8'))
+        if isinstance(source, buffer_types):
+            digest.update(memoryview(source))
+        elif isinstance(source, string_types) and not self.hashContents:
+            stat = os.stat(source)
+            digest.update(('%s\n%d\n%r' % (os.path.abspath(source),
+                                           stat.st_size, stat.st_mtime))
+                          .encode('utf-8'))
+        elif isinstance(source, string_types):
+            with open(source, 'rb') as handle:
+                self.__hashFile(digest, handle)
+        else:
+            position = source.tell()
+            try:
+                self.__hashFile(digest, source)
+            finally:
+                source.seek(position)
+        return digest.hexdigest()
+
+    @staticmethod
+    def __hashFile(digest, handle):
+        for chunk in iter(lambda: handle.read(1 << 20), b''):
+            digest.update(chunk)
+
+    def entry(self, source):
+        """ CacheEntry of a workbook path, file object or buffer """
+        return CacheEntry(self, os.path.join(self.directory,
+                                             self.key(source)))
+
+    def touch(self, entryDirectory):
+        """ Mark an entry as recently used """
+        try:
+            os.utime(entryDirectory, None)
+        except EnvironmentError:
+            pass
+
+    def evict(self, keep=None):
+        """ Remove the least recently used entries until the cache fits in
+        maxBytes. The `keep` entry directory is never removed.
+
+        """
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if not os.path.isdir(path):
+                continue
+            size = 0
+            for fileName in os.listdir(path):
+                try:
+                    size += os.path.getsize(os.path.join(path, fileName))
+                except EnvironmentError:
+                    pass
+            total += size
+            entries.append((os.path.getmtime(path), path, size))
+        for mtime, path, size in sorted(entries):
+            if total <= self.maxBytes:
+                break
+            if path == keep:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
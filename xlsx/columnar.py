@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+""" Typed column buffers for loading sheets into numeric matrices.
+NumPy arrays are used when NumPy is installed, otherwise the stdlib `array`
+module (and lists for dates and strings).
+
+"""
+
+from __future__ import unicode_literals
+
+import re
+from array import array
+
+from xlsx.xldate import xldate_as_tuple, xldates_as_datetimes
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Kinds of columns, in order of how general they are. A column takes the
+# most general kind of its cells. Date serials are tracked separately: a
+# column of only dates becomes datetime64, dates mixed with plain numbers
+# make a float column.
+KIND_INT = 0
+KIND_FLOAT = 1
+KIND_OBJECT = 2
+
+intPattern = re.compile(r"^-?\d{1,18}$")
+
+
+class Column(object):
+    """ A typed column of a sheet.
+    Attributes::
+
+        values -- numpy array, or array.array/list without numpy
+        mask -- true for every position that has no cell
+        dtype -- 'int64', 'float64', 'datetime64[s]' or 'object'
+
+    """
+
+    __slots__ = ('values', 'mask', 'dtype')
+
+    def __init__(self, values, mask, dtype):
+        self.values = values
+        self.mask = mask
+        self.dtype = dtype
+
+    def __len__(self):
+        return len(self.values)
+
+
+def _numberText(number):
+    """ The text Excel writes for a number, as far as it can be told from
+    the number alone
+
+    """
+    if isinstance(number, float) and not number.is_integer():
+        return repr(number)
+    return '%d' % number
+
+
+class ColumnBuilder(object):
+    """ Accumulates the cells of one column while a sheet is streamed.
+    Integers go straight into an int64 buffer, which turns into a float
+    buffer at the first other number or date serial; the column only falls
+    back to a list of objects once it sees a string.
+
+    """
+
+    __slots__ = ('numbers', 'objects', 'present', 'dates', 'kind',
+                 'hasDates', 'hasNumbers', 'texts')
+
+    def __init__(self):
+        self.numbers = array('q')
+        self.objects = None
+        self.present = array('B')
+        self.dates = array('B')
+        self.kind = KIND_INT
+        self.hasDates = False
+        self.hasNumbers = False
+        # Text of the numbers that _numberText would not give back, by
+        # position, for columns that turn into objects
+        self.texts = {}
+
+    def pad(self, position):
+        """ Mark every position up to `position` without a cell as missing """
+        missing = position - len(self.present)
+        if missing > 0:
+            self.present.extend([0] * missing)
+            self.dates.extend([0] * missing)
+            if self.objects is None:
+                self.numbers.extend([0] * missing)
+            else:
+                self.objects.extend([None] * missing)
+
+    def addNumber(self, position, text, isDate):
+        self.pad(position)
+        self.present.append(1)
+        self.dates.append(isDate)
+        if isDate:
+            self.hasDates = True
+        else:
+            self.hasNumbers = True
+            if self.kind == KIND_INT and not intPattern.match(text):
+                self.kind = KIND_FLOAT
+        if self.objects is not None:
+            self.objects.append(xldate_as_tuple(float(text), datemode=0)
+                                if isDate else text)
+            return
+        if self.numbers.typecode == 'q':
+            if self.kind == KIND_INT and not isDate:
+                number = int(text)
+                self.numbers.append(number)
+                if '%d' % number != text:
+                    self.texts[position] = text
+                return
+            self.numbers = array('d', self.numbers)
+        number = float(text)
+        self.numbers.append(number)
+        if not isDate and _numberText(number) != text:
+            self.texts[position] = text
+
+    def addObject(self, position, value):
+        self.pad(position)
+        self.present.append(1)
+        self.dates.append(0)
+        if self.objects is None:
+            self.objects = self.__numberObjects()
+            self.numbers = None
+            self.texts = None
+        self.kind = KIND_OBJECT
+        self.objects.append(value)
+
+    def __numberObjects(self):
+        """ The numbers seen so far as the values rowsIter gives for them,
+        for a column that turned out to hold strings too.
+
+        """
+        objects = []
+        texts = self.texts
+        for position, (number, present, isDate) in enumerate(
+                zip(self.numbers, self.present, self.dates)):
+            if not present:
+                objects.append(None)
+            elif isDate:
+                objects.append(xldate_as_tuple(number, datemode=0))
+            else:
+                objects.append(texts.get(position) or _numberText(number))
+        return objects
+
+    def build(self, length):
+        self.pad(length)
+        mask = [not present for present in self.present]
+        if numpy is not None:
+            mask = numpy.array(mask, dtype=bool)
+        else:
+            mask = array('B', mask)
+
+        if self.kind == KIND_OBJECT:
+            if numpy is not None:
+                return Column(numpy.array(self.objects, dtype=object), mask,
+                              'object')
+            return Column(self.objects, mask, 'object')
+
+        if self.hasDates and not self.hasNumbers:
+            # Serials that are no dates (negative or too large) are masked
+            values = xldates_as_datetimes(self.numbers, datemode=0,
+                                          errors='mask')
+            if numpy is not None:
+                mask |= numpy.isnat(values)
+                values[mask] = numpy.datetime64('NaT')
+            else:
+                for position, value in enumerate(values):
+                    if value is None:
+                        mask[position] = 1
+                    elif mask[position]:
+                        values[position] = None
+            return Column(values, mask, 'datetime64[s]')
+
+        if self.kind == KIND_INT and not self.hasDates:
+            if numpy is not None:
+                return Column(numpy.frombuffer(self.numbers, dtype='int64'),
+                              mask, 'int64')
+            return Column(self.numbers, mask, 'int64')
+
+        if numpy is not None:
+            return Column(numpy.frombuffer(self.numbers, dtype='float64'),
+                          mask, 'float64')
+        return Column(self.numbers, mask, 'float64')
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+""" Stream sheets out as CSV or NDJSON.
+
+Rows are read in batches (Sheet.batchesIter) and handed to buffered writers
+a batch at a time, so memory stays constant whatever the sheet size. Cells
+are placed by column position, gaps are filled, and dates are written in
+ISO 8601 form. Usage::
+
+    exportWorkbook('book.xlsx', 'out/', format='ndjson', compression='gzip')
+
+or from the command line::
+
+    xlsx-export book.xlsx --sheet 1 -o sheet1.csv
+    xlsx-export book.xlsx --all -o out/ --compression gzip --workers 4
+
+"""
+
+from __future__ import print_function, unicode_literals
+
+import io
+import os
+import re
+import csv
+import sys
+import json
+import datetime
+import argparse
+
+from xlsx import Workbook
+
+FORMATS = ('csv', 'ndjson')
+
+# Output compressions by name: (module name, file extension)
+COMPRESSIONS = {
+    'gzip': ('gzip', '.gz'),
+    'bz2': ('bz2', '.bz2'),
+    'xz': ('lzma', '.xz'),
+}
+
+_BUFFER_SIZE = 1 << 20
+
+
+def formatDate(value):
+    """ ISO 8601 text of a date tuple (see xldate_as_tuple) or datetime.
+    Dates without a time are written as 'YYYY-MM-DD', times without a date
+    as 'HH:MM:SS'.
+
+    """
+    if isinstance(value, datetime.datetime):
+        value = value.timetuple()[:6]
+    year, month, day, hour, minute, second = value
+    if not (year or month or day):
+        return '%02d:%02d:%02d' % (hour, minute, second)
+    if not (hour or minute or second):
+        return '%04d-%02d-%02d' % (year, month, day)
+    return '%04d-%02d-%02d %02d:%02d:%02d' % value
+
+
+def _formatRow(values, fill):
+    """ Values of a row ready for a writer: dates as text, empty cells as
+    fill
+
+    """
+    return [fill if value is None or value == ''
+            else formatDate(value)
+            if isinstance(value, (tuple, datetime.datetime))
+            else value
+            for value in values]
+
+
+def openOutput(path, compression=None):
+    """ Open a text file for writing, optionally compressed.
+    Arguments::
+
+        path -- file to write, '-' for standard output
+        compression -- None or a key of COMPRESSIONS
+
+    """
+    if path == '-':
+        stream = getattr(sys.stdout, 'buffer', sys.stdout)
+        if compression is not None:
+            raise ValueError("Compressed output needs a file")
+        return io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    if compression is None:
+        return io.open(path, 'w', encoding='utf-8', newline='',
+                       buffering=_BUFFER_SIZE)
+    if compression not in COMPRESSIONS:
+        raise ValueError("Unknown compression %r" % (compression,))
+    module = __import__(COMPRESSIONS[compression][0])
+    return io.TextIOWrapper(io.BufferedWriter(module.open(path, 'wb'),
+                                              _BUFFER_SIZE),
+                            encoding='utf-8', newline='')
+
+
+def exportSheet(sheet, output, format='csv', fill='', header=False,
+                batchSize=10000):
+    """ Write a sheet to a text file object in a single streaming pass.
+    Arguments::
+
+        sheet -- the Sheet to export
+        output -- text file object to write to
+        format -- 'csv', or 'ndjson' for a json array per row
+        fill -- value written for missing and empty cells
+        header -- ndjson only: use the first row as the keys of a json
+            object per row
+        batchSize -- rows handed to the writer at a time
+
+    Returns the number of rows written.
+
+    """
+    if format not in FORMATS:
+        raise ValueError("Unknown format %r" % (format,))
+    count = 0
+    keys = None
+    if format == 'csv':
+        writer = csv.writer(output, lineterminator='\n')
+    for rowNums, rows in sheet.batchesIter(batchSize, fill=fill, reuse=True):
+        rows = [_formatRow(values, fill) for values in rows]
+        if format == 'csv':
+            writer.writerows(rows)
+        else:
+            if header and keys is None:
+                keys = ['%s' % key for key in rows.pop(0)]
+            if keys is not None:
+                rows = [dict(zip(keys, values)) for values in rows]
+            output.write(''.join(json.dumps(values, ensure_ascii=False,
+                                            default=str) + '\n'
+                                 for values in rows))
+        count += len(rows)
+    return count
+
+
+def outputName(sheet, format, compression=None):
+    """ File name of an exported sheet: its id and name, made safe """
+    name = re.sub(r'[\\/:*?"<>|\s]+', '_', sheet.name).strip('_')
+    return '%d-%s.%s%s' % (sheet.id, name, format,
+                           COMPRESSIONS[compression][1] if compression
+                           else '')
+
+
+def _exportToFile(filename, key, path, format, compression, options):
+    workbook = Workbook(filename, typedValues=options.pop('typed', False))
+    output = openOutput(path, compression)
+    try:
+        return exportSheet(workbook[key], output, format, **options)
+    finally:
+        if path == '-':
+            # Leave standard output open
+            output.flush()
+            output.detach()
+        else:
+            output.close()
+
+
+def exportWorkbook(filename, directory, sheets=None, format='csv',
+                   compression=None, workers=None, typed=False, **options):
+    """ Export sheets of a workbook to one file each in a directory.
+    Arguments::
+
+        filename -- path of the workbook
+        directory -- where to write, created if missing
+        sheets -- names or ids of the sheets, all sheets if None
+        format -- 'csv' or 'ndjson'
+        compression -- None or a key of COMPRESSIONS
+        workers -- export this many sheets at once in worker processes,
+            one at a time in this process if None
+        typed -- read values with Workbook's typedValues
+        options -- other exportSheet arguments
+
+    Returns the paths written, in the order of sheets.
+
+    """
+    workbook = Workbook(filename)
+    if sheets is None:
+        sheets = [sheet.id for sheet in workbook]
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    options['typed'] = typed
+    jobs = []
+    for key in sheets:
+        path = os.path.join(directory,
+                            outputName(workbook[key], format, compression))
+        jobs.append((filename, key, path, format, compression,
+                     dict(options)))
+
+    if workers is None:
+        for job in jobs:
+            _exportToFile(*job)
+    else:
+        from concurrent import futures
+        pool = futures.ProcessPoolExecutor(max_workers=workers)
+        try:
+            for result in [pool.submit(_exportToFile, *job) for job in jobs]:
+                result.result()
+        finally:
+            pool.shutdown()
+    return [job[2] for job in jobs]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Export xlsx sheets as CSV or NDJSON")
+    parser.add_argument('workbook')
+    parser.add_argument('--sheet', action='append',
+                        help='name or id of a sheet to export (repeatable), '
+                        'the first sheet by default')
+    parser.add_argument('--all', action='store_true',
+                        help='export every sheet')
+    parser.add_argument('-o', '--output', default='-',
+                        help="output file, or directory when exporting "
+                        "several sheets (default: standard output)")
+    parser.add_argument('-f', '--format', choices=FORMATS, default='csv')
+    parser.add_argument('--compression', choices=sorted(COMPRESSIONS))
+    parser.add_argument('--workers', type=int,
+                        help='sheets exported in parallel')
+    parser.add_argument('--fill', default='',
+                        help='value of missing cells')
+    parser.add_argument('--header', action='store_true',
+                        help='ndjson: write objects keyed by the first row')
+    parser.add_argument('--typed', action='store_true',
+                        help='write numbers and booleans as such')
+    args = parser.parse_args(argv)
+
+    sheets = None
+    if args.sheet:
+        sheets = [int(key) if key.isdigit() else key for key in args.sheet]
+    options = {'fill': args.fill, 'header': args.header}
+    if args.all or (sheets and len(sheets) > 1):
+        if args.output == '-':
+            parser.error("exporting several sheets needs an --output "
+                         "directory")
+        for path in exportWorkbook(args.workbook, args.output, sheets,
+                                   args.format, args.compression,
+                                   args.workers, args.typed, **options):
+            print(path, file=sys.stderr)
+        return 0
+
+    options['typed'] = args.typed
+    _exportToFile(args.workbook, sheets[0] if sheets else 1, args.output,
+                  args.format, args.compression, options)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
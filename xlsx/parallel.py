@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+""" Parse a single big sheet on several processes.
+
+The sheet document is inflated here and cut into chunks of whole `<row>`
+elements at their start tags; every chunk is wrapped in copies of the root
+and `<sheetData>` tags, so that it is a small well-formed document, and
+decoded by a worker with the same code as Sheet.rowsIter. The shared
+strings and style kinds are handed to each worker once, when it starts.
+Rows come back in document order. Usage::
+
+    for rowNum, cells in workbook[1].parallelRowsIter(workers=8):
+        ...
+
+Inflating, cutting and building the Cell objects stay in this process, so
+they bound the speedup.
+
+"""
+
+from __future__ import unicode_literals
+
+import re
+import threading
+import multiprocessing
+from collections import deque
+
+from xlsx import ET, Cell, Sheet, _decodeRows, _cellTuple, _startPool, \
+    _readSheetHeader
+
+# Uncompressed bytes of sheet xml per chunk
+DEFAULT_CHUNK_BYTES = 4 << 20
+
+# Start tag of the root element, skipping the xml declaration
+_ROOT_START = re.compile(br'<([^\s?!/>][^\s/>]*)[^>]*>')
+
+# Characters that may follow a tag name
+_TAG_ENDS = (b'', b' ', b'>', b'/', b'\t', b'\r', b'\n')
+
+
+def _rowStart(data, rowOpen, start):
+    """ Offset of the first `<row` start tag in data from start on, -1 if
+    there is none
+
+    """
+    after = len(rowOpen)
+    position = data.find(rowOpen, start)
+    while position != -1 and \
+            data[position + after:position + after + 1] not in _TAG_ENDS:
+        position = data.find(rowOpen, position + after)
+    return position
+
+
+def sheetChunks(handle, chunkBytes=DEFAULT_CHUNK_BYTES):
+    """ Cut a sheet document into well-formed documents holding runs of its
+    rows, about chunkBytes each.
+    Arguments::
+
+        handle -- file object of the sheet document, see DomZip.open
+        chunkBytes -- bytes of rows to read per chunk
+
+    """
+    data, sheetData = _readSheetHeader(handle)
+    if sheetData is None or sheetData.group(3):
+        # No rows at all
+        return
+    root = _ROOT_START.search(data)
+    sheetDataTag = sheetData.group(1)
+    head = root.group(0) + b'<' + sheetDataTag + b'>'
+    tail = b'</' + sheetDataTag + b'></' + root.group(1) + b'>'
+    rowOpen = b'<' + (sheetData.group(2) or b'') + b'row'
+    sheetDataEnd = b'</' + sheetDataTag
+
+    data = data[sheetData.end():]
+    finished = False
+    while True:
+        if not finished:
+            end = data.find(sheetDataEnd)
+            if end != -1:
+                data = data[:end]
+                finished = True
+        # Cut at the first row starting after chunkBytes, what comes
+        # before it is made of whole rows
+        cut = _rowStart(data, rowOpen, chunkBytes) \
+            if len(data) > chunkBytes else -1
+        if cut != -1:
+            yield head + data[:cut] + tail
+            data = data[cut:]
+        elif finished:
+            if data.strip():
+                yield head + data + tail
+            return
+        else:
+            block = handle.read(chunkBytes)
+            if not block:
+                # Truncated document, let the parser complain
+                finished = True
+            data += block
+
+
+# State of a chunk worker, set up once per thread or process
+_chunkWorker = threading.local()
+
+
+def _initChunkWorker(sharedStrings, styleKinds, typedValues):
+    _chunkWorker.sharedStrings = sharedStrings
+    _chunkWorker.styleKinds = styleKinds
+    _chunkWorker.cellValue = Sheet._typedCellValue if typedValues \
+        else Sheet._cellValue
+
+
+def _readChunkRows(chunk, *initargs):
+    """ Decode a chunk in a worker as (rowNum, [(column, value, formula),
+    ...]) tuples. Workers without an initializer get its arguments with
+    every task.
+
+    """
+    if initargs:
+        _initChunkWorker(*initargs)
+    sheetData = ET.fromstring(chunk)[0]
+    return list(_decodeRows(sheetData, _chunkWorker, _chunkWorker.cellValue,
+                            _cellTuple))
+
+
+def parallelRows(sheet, workers=None, chunkBytes=DEFAULT_CHUNK_BYTES,
+                 executor='process', counts=None):
+    """ Stream the rows of a sheet as (rowNum, cells) tuples, like
+    Sheet.rowsIter, decoding chunks of it in a pool of workers. See
+    Sheet.parallelRowsIter.
+    Arguments::
+
+        sheet -- the Sheet to read
+        workers -- number of workers, the number of CPUs by default
+        chunkBytes -- uncompressed bytes of sheet xml per task
+        executor -- 'process' or 'thread'
+        counts -- list whose first item is increased by the number of
+            cells of every row, see xlsx.stats
+
+    """
+    workbook = sheet.workbook
+    workers = workers or multiprocessing.cpu_count()
+    initargs = (workbook._workerSharedStrings(executor), workbook.styleKinds,
+                workbook.typedValues)
+    pool, taskArgs = _startPool(executor, workers, _initChunkWorker,
+                                initargs)
+    handle = workbook.domzip.open(sheet.path)
+    # Chunks being decoded, in document order. Reading stops while twice
+    # as many as there are workers wait, so memory stays bounded.
+    pending = deque()
+    try:
+        chunks = sheetChunks(handle, chunkBytes)
+        while True:
+            for chunk in chunks:
+                pending.append(pool.submit(_readChunkRows, chunk, *taskArgs))
+                if len(pending) > 2 * workers:
+                    break
+            if not pending:
+                break
+            for rowNum, cells in pending.popleft().result():
+                if counts is not None:
+                    counts[0] += len(cells)
+                yield rowNum, [Cell(rowNum, column, value, formula)
+                               for column, value, formula in cells]
+    finally:
+        for result in pending:
+            result.cancel()
+        pool.shutdown()
+        handle.close()
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+""" Opt-in counters and phase timings of the reader hot paths.
+
+A Workbook opened with stats records how many bytes it inflated, how many
+rows and cells it decoded, how many cells were shared strings or dates,
+and how long each phase took. Every Sheet keeps its own Stats, which roll
+up into the workbook's. Usage::
+
+    def export(stats, phase, seconds):
+        metrics.timing('xlsx.%s' % phase, seconds, tags={'sheet': stats.name})
+
+    book = Workbook('big.xlsx', stats=Stats(callback=export))
+    rows = book[1].rows()
+    print(book.stats.asDict())
+
+Phases are PHASE_PARSE (DomZip.__getitem__, parsing a whole part),
+PHASE_SHARED_STRINGS (decoding the shared strings table), PHASE_ROWS (time
+spent inside the rowsIter and valuesIter loops, not in their consumers)
+and PHASE_LOAD (Sheet.rows and friends loading a whole sheet, which
+includes its PHASE_ROWS time). Sheets loaded in loadSheets workers are not
+counted. Without stats the readers take their usual paths, so the cost of
+the feature is a check per part or per sheet iterator.
+
+"""
+
+from __future__ import unicode_literals
+
+import datetime
+from timeit import default_timer
+
+PHASE_PARSE = 'parse'
+PHASE_SHARED_STRINGS = 'sharedStrings'
+PHASE_ROWS = 'rowsIter'
+PHASE_LOAD = 'load'
+
+# Counters of a Stats object, in the order of asDict
+COUNTERS = ('bytesInflated', 'rows', 'cells', 'sharedStringHits',
+            'dateConversions')
+
+# Phases that parse xml, summed up by Stats.parseSeconds
+_PARSE_PHASES = (PHASE_PARSE, PHASE_SHARED_STRINGS, PHASE_ROWS)
+
+
+class Stats(object):
+    """ Counters and per phase timings of a workbook or a sheet """
+
+    def __init__(self, callback=None, name=None, parent=None):
+        """ Start with every counter at zero.
+        Arguments::
+
+            callback -- called as callback(stats, phase, seconds) whenever
+                a phase ends, with the Stats of the sheet (or workbook) it
+                ran for; sheets use their workbook's callback
+            name -- name of the sheet, None for a workbook
+            parent -- Stats that every count is added to as well
+
+        """
+        self.callback = callback
+        self.name = name
+        self.parent = parent
+        self.bytesInflated = 0
+        self.rows = 0
+        self.cells = 0
+        self.sharedStringHits = 0
+        self.dateConversions = 0
+        # Seconds spent and times entered by phase
+        self.phaseSeconds = {}
+        self.phaseCalls = {}
+
+    def child(self, name):
+        """ New Stats for a sheet, rolling up into these """
+        return Stats(self.callback, name, self)
+
+    def add(self, **counts):
+        """ Add to counters (see COUNTERS) here and in the parents """
+        stats = self
+        while stats is not None:
+            for counter, amount in counts.items():
+                setattr(stats, counter, getattr(stats, counter) + amount)
+            stats = stats.parent
+
+    def addPhase(self, phase, seconds):
+        """ Record a run of a phase here and in the parents, then report it
+        to the callback
+
+        """
+        stats = self
+        while stats is not None:
+            stats.phaseSeconds[phase] = \
+                stats.phaseSeconds.get(phase, 0.0) + seconds
+            stats.phaseCalls[phase] = stats.phaseCalls.get(phase, 0) + 1
+            stats = stats.parent
+        if self.callback is not None:
+            self.callback(self, phase, seconds)
+
+    def timer(self, phase):
+        """ Context manager timing a run of a phase """
+        return _PhaseTimer(self, phase)
+
+    @property
+    def parseSeconds(self):
+        """ Seconds spent parsing xml, over all phases that do """
+        return sum(self.phaseSeconds.get(phase, 0.0)
+                   for phase in _PARSE_PHASES)
+
+    def asDict(self):
+        """ Plain dict of the counters and phase timings, for exporters """
+        result = dict((counter, getattr(self, counter))
+                      for counter in COUNTERS)
+        result['parseSeconds'] = self.parseSeconds
+        result['phaseSeconds'] = dict(self.phaseSeconds)
+        result['phaseCalls'] = dict(self.phaseCalls)
+        return result
+
+    def __repr__(self):
+        return '<Stats %s%r>' % ('%s ' % self.name if self.name else '',
+                                 self.asDict())
+
+
+class _PhaseTimer(object):
+
+    __slots__ = ('stats', 'phase', 'start')
+
+    def __init__(self, stats, phase):
+        self.stats = stats
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = default_timer()
+        return self.stats
+
+    def __exit__(self, *exc):
+        self.stats.addPhase(self.phase, default_timer() - self.start)
+
+
+class CountingReader(object):
+    """ File object wrapper counting the bytes read through it into
+    bytesInflated
+
+    """
+
+    def __init__(self, handle, stats):
+        self.handle = handle
+        self.stats = stats
+
+    def read(self, size=-1):
+        data = self.handle.read(size)
+        self.stats.add(bytesInflated=len(data))
+        return data
+
+    def close(self):
+        self.handle.close()
+
+
+# Values of decoded dates: tuples from xldate_as_tuple, datetimes in typed
+# value mode
+_DATE_TYPES = (tuple, datetime.datetime)
+
+
+def countingDecoder(cellValue, counts, cellType):
+    """ Wrap a cell value decoder (see Sheet._cellValue) so that it counts
+    into the list counts: decoded cells, shared string hits and date
+    conversions. cellType gives the `t` attribute of the cells the
+    decoder takes, see xlsx.backends.Backend.
+
+    """
+    def decode(cell, sharedStrings, styleKinds):
+        value = cellValue(cell, sharedStrings, styleKinds)
+        counts[0] += 1
+        if cellType(cell) == "s":
+            counts[1] += 1
+        elif isinstance(value, _DATE_TYPES):
+            counts[2] += 1
+        return value
+    return decode
+
+
+def timedRows(rows, stats, counts):
+    """ Pass the rows of a row generator through, timing the generator
+    alone into PHASE_ROWS and counting rows, plus the cells, shared string
+    hits and date conversions its countingDecoder recorded in counts, when
+    it ends or is closed.
+
+    """
+    seconds = 0.0
+    rowCount = 0
+    clock = default_timer
+    try:
+        while True:
+            start = clock()
+            try:
+                row = next(rows)
+            except StopIteration:
+                break
+            finally:
+                seconds += clock() - start
+            rowCount += 1
+            yield row
+    finally:
+        rows.close()
+        stats.add(rows=rowCount, cells=counts[0], sharedStringHits=counts[1],
+                  dateConversions=counts[2])
+        stats.addPhase(PHASE_ROWS, seconds)
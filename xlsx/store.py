@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+""" Compact storage of loaded sheets.
+
+A loaded sheet keeps its cells in a few typed arrays (one slot per cell, in
+document order) plus a table of the distinct values, instead of one Cell
+object per cell held in three dicts. Cell objects are only built when they
+are asked for, through the RowsView and ColsView mappings returned by
+Sheet.rows() and Sheet.cols().
+
+"""
+
+from __future__ import unicode_literals
+
+from array import array
+from bisect import bisect_left
+
+try:
+    from collections.abc import Mapping
+except ImportError: # Python 2
+    from collections import Mapping
+
+NO_FORMULA = -1
+
+
+class SheetStore(object):
+    """ The cells of a loaded sheet.
+    Rows are kept in ascending order in `rowNumbers`, and the cells of row
+    i are the slots rowStarts[i] to rowStarts[i + 1]. Every slot holds a
+    column number, and the ids of its value and formula in `objects`.
+
+    """
+
+    def __init__(self, cellFactory, columnIndex, columnLetters,
+                 typedValues=False):
+        """ Create an empty store.
+        Arguments::
+
+            cellFactory -- builds cells, as Cell(row, column, value,
+                formula=formula, columnNumber=columnNumber)
+            columnIndex -- converts column letters to column numbers
+            columnLetters -- converts column numbers to column letters
+            typedValues -- values are of mixed types, so equal values of
+                different types (1, 1.0, True) are stored apart
+
+        """
+        self.cellFactory = cellFactory
+        self.columnIndex = columnIndex
+        self.columnLetters = columnLetters
+        self.rowNumbers = array(str('i'))
+        self.rowStarts = array(str('l'), [0])
+        self.columns = array(str('i'))
+        self.values = array(str('i'))
+        self.formulas = array(str('i'))
+        self.objects = []
+        self.columnOrder = []
+        self.__ids = {}
+        self.__seenColumns = set()
+        self.__columnSlots = None
+        self.__rowIndex = None
+        self.__sortedColumns = True
+        self.__typedValues = typedValues
+
+    def __objectId(self, value):
+        id = self.__ids.get(value)
+        if id is None:
+            id = self.__ids[value] = len(self.objects)
+            self.objects.append(value)
+        return id
+
+    def __typedObjectId(self, value):
+        # Keyed by type too, as 1, 1.0 and True are equal but must stay
+        # apart
+        key = (value.__class__, value)
+        id = self.__ids.get(key)
+        if id is None:
+            id = self.__ids[key] = len(self.objects)
+            self.objects.append(value)
+        return id
+
+    def addRow(self, rowNum, cells):
+        """ Add a row of (column letters, value, formula) tuples """
+        columnIndex = self.columnIndex
+        objectId = self.__typedObjectId if self.__typedValues \
+            else self.__objectId
+        previous = 0
+        for column, value, formula in cells:
+            colNum = columnIndex(column)
+            if colNum < previous:
+                self.__sortedColumns = False
+            previous = colNum
+            if colNum not in self.__seenColumns:
+                self.__seenColumns.add(colNum)
+                self.columnOrder.append(colNum)
+            self.columns.append(colNum)
+            self.values.append(objectId(value))
+            self.formulas.append(NO_FORMULA if formula is None
+                                 else objectId(formula))
+        if self.rowNumbers and rowNum <= self.rowNumbers[-1]:
+            # Rows out of order, fall back to a dict for row lookups
+            if self.__rowIndex is None:
+                self.__rowIndex = dict((number, index) for index, number
+                                       in enumerate(self.rowNumbers))
+        if self.__rowIndex is not None:
+            self.__rowIndex[rowNum] = len(self.rowNumbers)
+        self.rowNumbers.append(rowNum)
+        self.rowStarts.append(len(self.columns))
+
+    def finish(self):
+        """ Drop the lookup tables only needed while adding rows """
+        self.__ids = None
+        self.__seenColumns = None
+
+    def __len__(self):
+        return len(self.columns)
+
+    def rowPosition(self, rowNum):
+        """ Index of a row in rowNumbers, or None """
+        if self.__rowIndex is not None:
+            return self.__rowIndex.get(rowNum)
+        position = bisect_left(self.rowNumbers, rowNum)
+        if position < len(self.rowNumbers) and \
+                self.rowNumbers[position] == rowNum:
+            return position
+        return None
+
+    def cell(self, slot, rowNum=None):
+        """ Build the Cell of a slot """
+        if rowNum is None:
+            rowNum = self.rowNumbers[
+                bisect_left(self.rowStarts, slot + 1) - 1]
+        formula = self.formulas[slot]
+        colNum = self.columns[slot]
+        return self.cellFactory(
+            rowNum, self.columnLetters(colNum),
+            self.objects[self.values[slot]],
+            formula=None if formula == NO_FORMULA else self.objects[formula],
+            columnNumber=colNum)
+
+    def rowCells(self, position):
+        rowNum = self.rowNumbers[position]
+        return [self.cell(slot, rowNum) for slot in
+                range(self.rowStarts[position], self.rowStarts[position + 1])]
+
+    def findCell(self, rowNum, colNum):
+        """ Cell at a row and column number, or None """
+        position = self.rowPosition(rowNum)
+        if position is None:
+            return None
+        start = self.rowStarts[position]
+        end = self.rowStarts[position + 1]
+        if self.__sortedColumns:
+            slot = bisect_left(self.columns, colNum, start, end)
+            if slot < end and self.columns[slot] == colNum:
+                return self.cell(slot, rowNum)
+            return None
+        for slot in range(start, end):
+            if self.columns[slot] == colNum:
+                return self.cell(slot, rowNum)
+        return None
+
+    def columnSlots(self, colNum):
+        """ Slots of a column in row order, indexed on first use """
+        if self.__columnSlots is None:
+            columnSlots = dict((column, array(str('l')))
+                               for column in self.columnOrder)
+            for slot, column in enumerate(self.columns):
+                columnSlots[column].append(slot)
+            self.__columnSlots = columnSlots
+        return self.__columnSlots.get(colNum)
+
+    def iterRows(self):
+        """ Stream the rows as (rowNum, [(column letters, value, formula),
+        ...]) tuples
+
+        """
+        for position, rowNum in enumerate(self.rowNumbers):
+            yield rowNum, [(cell.column, cell.value, cell.formula)
+                           for cell in self.rowCells(position)]
+
+    def iterIds(self):
+        """ Stream the ids of all cells, in document order """
+        columnLetters = self.columnLetters
+        for position, rowNum in enumerate(self.rowNumbers):
+            for slot in range(self.rowStarts[position],
+                              self.rowStarts[position + 1]):
+                yield "%s%s" % (columnLetters(self.columns[slot]), rowNum)
+
+
+class RowsView(Mapping):
+    """ Read-only mapping of row numbers to lists of Cells """
+
+    def __init__(self, store):
+        self.store = store
+
+    def __getitem__(self, rowNum):
+        position = self.store.rowPosition(rowNum)
+        if position is None:
+            raise KeyError(rowNum)
+        return self.store.rowCells(position)
+
+    def __iter__(self):
+        return iter(self.store.rowNumbers)
+
+    def __len__(self):
+        return len(self.store.rowNumbers)
+
+    def __contains__(self, rowNum):
+        return self.store.rowPosition(rowNum) is not None
+
+
+class ColsView(Mapping):
+    """ Read-only mapping of column letters to lists of Cells. Columns are
+    iterated by column number, so 'B' comes before 'AA', and can also be
+    looked up by their number.
+
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def __columnNumber(self, column):
+        if isinstance(column, int):
+            return column
+        return self.store.columnIndex(column)
+
+    def __getitem__(self, column):
+        slots = self.store.columnSlots(self.__columnNumber(column))
+        if slots is None:
+            raise KeyError(column)
+        return [self.store.cell(slot) for slot in slots]
+
+    def __iter__(self):
+        columnLetters = self.store.columnLetters
+        return (columnLetters(colNum)
+                for colNum in sorted(self.store.columnOrder))
+
+    def __len__(self):
+        return len(self.store.columnOrder)
+
+    def __contains__(self, column):
+        return self.store.columnSlots(
+            self.__columnNumber(column)) is not None
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import threading
+import unittest
+
+if sys.version_info < (3, 5):
+    raise unittest.SkipTest("xlsx.aio needs Python 3.5+")
+
+import asyncio
+from concurrent import futures
+
+from xlsx import Workbook
+from xlsx.aio import openWorkbook, AsyncRows
+
+
+def collect(loop, rows):
+    """ Drain an async iterator from synchronous test code """
+    items = []
+    while True:
+        try:
+            items.append(loop.run_until_complete(rows.__anext__()))
+        except StopAsyncIteration:
+            return items
+
+
+class AsyncWorkbookTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.fixtures_dir = os.path.abspath(
+            os.path.join(os.path.dirname(__file__), 'fixtures'))
+        self.loop = asyncio.new_event_loop()
+        self.executor = futures.ThreadPoolExecutor(max_workers=2)
+
+    def tearDown(self):
+        self.executor.shutdown()
+        self.loop.close()
+
+    def test_same_rows(self):
+        for filename in os.listdir(self.fixtures_dir):
+            path = os.path.join(self.fixtures_dir, filename)
+            workbook = self.loop.run_until_complete(
+                openWorkbook(path, executor=self.executor))
+            expected = Workbook(path)
+            for sheet in workbook:
+                rows = collect(self.loop, sheet.rowsIter(batchSize=2))
+                self.assertEqual(
+                    [(row_num, [(cell.id, cell.value) for cell in cells])
+                     for row_num, cells in rows],
+                    [(row_num, [(cell.id, cell.value) for cell in cells])
+                     for row_num, cells in expected[sheet.id].rowsIter()])
+                self.assertEqual(
+                    collect(self.loop, sheet.valuesIter(batchSize=3)),
+                    list(expected[sheet.id].valuesIter()))
+            loaded = self.loop.run_until_complete(workbook[1].rows())
+            self.assertEqual(sorted(loaded), sorted(expected[1].rows()))
+            workbook.close()
+
+    def test_backpressure_and_close(self):
+        state = {'produced': 0, 'closed': False}
+        started = threading.Event()
+
+        def rows():
+            try:
+                for index in range(1000):
+                    state['produced'] += 1
+                    started.set()
+                    yield index
+            finally:
+                state['closed'] = True
+
+        iterator = AsyncRows(rows(), self.executor, batchSize=10)
+        self.assertEqual(self.loop.run_until_complete(iterator.__anext__()),
+                         0)
+        self.executor.submit(lambda: None).result()
+        # The batch handed over and one read ahead, nothing more
+        self.assertTrue(state['produced'] <= 20)
+        self.loop.run_until_complete(iterator.aclose())
+        self.executor.shutdown()
+        self.assertTrue(state['closed'])
+        self.assertTrue(state['produced'] <= 20)
+        self.assertEqual(collect(self.loop, iterator), [])
+
+    def test_cancel(self):
+        running = threading.Event()
+        gate = threading.Event()
+        state = {'closed': False}
+
+        def rows():
+            try:
+                running.set()
+                gate.wait(10)
+                yield 1
+            finally:
+                state['closed'] = True
+
+        iterator = AsyncRows(rows(), self.executor, batchSize=10)
+        task = self.loop.create_task(iterator.__anext__())
+
+        def cancel():
+            # Cancel while the batch is being read
+            running.wait(10)
+            self.loop.call_soon_threadsafe(task.cancel)
+
+        canceller = threading.Thread(target=cancel)
+        canceller.start()
+        self.assertRaises(asyncio.CancelledError,
+                          self.loop.run_until_complete, task)
+        canceller.join()
+        gate.set()
+        self.executor.shutdown()
+        self.assertTrue(state['closed'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+""" Conformance of the xml parser backends: every backend must read the
+fixtures exactly like the default one.
+
+"""
+from __future__ import unicode_literals
+import io
+import os
+import unittest
+
+from xlsx import Workbook, Sheet, ET, STYLE_NUMBER, STYLE_DATE, \
+    _decodeRows, _cellTuple
+from xlsx.backends import availableBackends, getBackend, lxmlEtree, \
+    _expatRows, _cellValue, _typedCellValue
+from xlsx.tests import test_basic
+
+FIXTURES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                            'fixtures'))
+
+SHEET = (
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/'
+    '2006/main"><sheetData>'
+    '<row r="1"><c r="A1" t="inlineStr"><is><t>inline</t></is></c>'
+    '<c r="B1" t="inlineStr"><is><t/></is></c>'
+    '<c r="C1" t="s"><v>1</v></c><c r="D1" s="1"><v>41134.5</v></c>'
+    '<c r="E1"><f>SUM(A2:A3)</f><v>3</v></c><c r="F1" t="b"><v>1</v></c>'
+    '<c r="G1" t="e"><f t="shared" si="0"/><v>#N/A</v></c>'
+    '<c r="H1" t="str"><f>"a"&amp;"b"</f><v>ab</v></c>'
+    '<c r="I1" s="1"/><c r="J1"><v/></c><c r="K1" s="1"><v>-2</v></c></row>'
+    '<row r="3"><c r="A3"><v>2.5</v></c></row>'
+    '</sheetData></worksheet>')
+
+
+class Tables(object):
+    sharedStrings = ['zero', 'one']
+    styleKinds = [STYLE_NUMBER, STYLE_DATE]
+
+
+class BackendConformanceTestCase(unittest.TestCase):
+
+    def assertSameWorkbook(self, expected, workbook):
+        self.assertEqual(list(workbook.keys()), list(expected.keys()))
+        if expected.sharedStrings is None:
+            self.assertEqual(workbook.sharedStrings, None)
+        else:
+            self.assertEqual(list(workbook.sharedStrings),
+                             list(expected.sharedStrings))
+        self.assertEqual(list(workbook.styleKinds),
+                         list(expected.styleKinds))
+        self.assertEqual(workbook.dcterms_modified, expected.dcterms_modified)
+        for sheet in expected:
+            other = workbook[sheet.id]
+            self.assertEqual(
+                [(row_num, [(cell.id, cell.value, cell.formula)
+                            for cell in cells])
+                 for row_num, cells in other.rowsIter()],
+                [(row_num, [(cell.id, cell.value, cell.formula)
+                            for cell in cells])
+                 for row_num, cells in sheet.rowsIter()])
+            self.assertEqual(list(other.valuesIter(fill='-')),
+                             list(sheet.valuesIter(fill='-')))
+            self.assertEqual(
+                [(row_num, [cell.id for cell in cells])
+                 for row_num, cells in other.rangeIter('B1:C2')],
+                [(row_num, [cell.id for cell in cells])
+                 for row_num, cells in sheet.rangeIter('B1:C2')])
+            self.assertEqual(
+                dict((cell.id, cell.value) for cells in
+                     other.rows().values() for cell in cells),
+                dict((cell.id, cell.value) for cells in
+                     sheet.rows().values() for cell in cells))
+
+    def test_fixtures(self):
+        for filename in sorted(os.listdir(FIXTURES_DIR)):
+            path = os.path.join(FIXTURES_DIR, filename)
+            for typedValues in (False, True):
+                expected = Workbook(path, typedValues=typedValues)
+                for backend in availableBackends():
+                    self.assertSameWorkbook(
+                        expected, Workbook(path, typedValues=typedValues,
+                                           backend=backend))
+
+    def test_cell_kinds(self):
+        """ The expat decoders must match the element ones """
+        rows = ET.fromstring(SHEET)[0]
+        for elementValue, expatValue in (
+                (Sheet._cellValue, _cellValue),
+                (Sheet._typedCellValue, _typedCellValue)):
+            self.assertEqual(
+                list(_expatRows(io.BytesIO(SHEET.encode('utf-8')), Tables,
+                                expatValue, _cellTuple, None, None, None)),
+                list(_decodeRows(rows, Tables, elementValue, _cellTuple)))
+        self.assertEqual(
+            [row_num for row_num, cells in _expatRows(
+                io.BytesIO(SHEET.encode('utf-8')), Tables, _cellValue,
+                _cellTuple, 2, 3, lambda column: column == 'A')],
+            [3])
+
+    def test_get_backend(self):
+        self.assertEqual(getBackend('expat').name, 'expat')
+        backend = getBackend('etree')
+        self.assertTrue(getBackend(backend) is backend)
+        self.assertRaises(ValueError, getBackend, 'sax')
+        if lxmlEtree is None:
+            self.assertRaises(ImportError, getBackend, 'lxml')
+            self.assertEqual(availableBackends(), ['etree', 'expat'])
+
+
+class ExpatWorkbookTestCase(test_basic.WorkbookTestCase):
+    """
+    Run all the same tests in WorkbookTestCase, but decoding sheets from
+    expat events.
+    """
+
+    def setUp(self):
+        """ Getting all file from fixtures dir """
+        self.workbooks = {}
+        for filename in os.listdir(FIXTURES_DIR):
+            self.workbooks[filename] = Workbook(
+                os.path.join(FIXTURES_DIR, filename), backend='expat')
+
+
+@unittest.skipIf(lxmlEtree is None, "lxml is not installed")
+class LxmlWorkbookTestCase(test_basic.WorkbookTestCase):
+    """
+    Run all the same tests in WorkbookTestCase, but parsing with lxml.
+    """
+
+    def setUp(self):
+        """ Getting all file from fixtures dir """
+        self.workbooks = {}
+        for filename in os.listdir(FIXTURES_DIR):
+            self.workbooks[filename] = Workbook(
+                os.path.join(FIXTURES_DIR, filename), backend='lxml')
+
+
+if __name__ == '__main__':
+    unittest.main()
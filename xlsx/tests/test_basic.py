@@ -1,11 +1,23 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
+import io
 import os
+import codecs
+import datetime
 import unittest
+from array import array
 
 import six
 
-from xlsx import Workbook
+try:
+    from collections.abc import Mapping
+except ImportError: # Python 2
+    from collections import Mapping
+
+from xlsx import Workbook, Sheet, Cell, SharedStrings, LazySharedStrings, \
+    ErrorValue, STYLE_NUMBER, STYLE_DATE, STYLE_TEXT, columnIndex, \
+    columnLetters, ET
+from xlsx.store import SheetStore
 
 class WorkbookTestCase(unittest.TestCase):
 
@@ -26,8 +38,8 @@ class WorkbookTestCase(unittest.TestCase):
             for sheet in workbook:
                 assert hasattr(sheet, 'id')
                 assert isinstance(sheet.name, six.string_types)
-                assert isinstance(sheet.rows(), dict)
-                assert isinstance(sheet.cols(), dict)
+                assert isinstance(sheet.rows(), Mapping)
+                assert isinstance(sheet.cols(), Mapping)
 
                 for row_num, cells in six.iteritems(sheet.rows()):
                     assert isinstance(row_num, int)
@@ -66,6 +78,306 @@ class WorkbookTestCase(unittest.TestCase):
         self.assertEqual(workbook[2].cols()['A'][1].value,
                          'エム セシビ め「こを バジョン')
 
+    def test_rows_iter(self):
+        """ Streaming rows must match the fully loaded sheet """
+        for filename, workbook in self.workbooks.items():
+            for sheet in workbook:
+                streamed = dict((row_num, [(cell.id, cell.value)
+                                           for cell in cells])
+                                for row_num, cells in sheet.rowsIter())
+                loaded = dict((row_num, [(cell.id, cell.value)
+                                         for cell in cells])
+                              for row_num, cells in six.iteritems(sheet.rows()))
+                self.assertEqual(streamed, loaded)
+
+    def test_values_iter(self):
+        """ Value rows must line up with the cells by column position """
+        for filename, workbook in self.workbooks.items():
+            for sheet in workbook:
+                rows = sheet.rows()
+                for row_num, values in sheet.valuesIter(fill=0):
+                    self.assertTrue(isinstance(values, tuple))
+                    for cell in rows[row_num]:
+                        self.assertEqual(values[columnIndex(cell.column) - 1],
+                                         cell.value)
+                    self.assertEqual(len(values),
+                                     max(columnIndex(cell.column)
+                                         for cell in rows[row_num]))
+
+    def test_batches_iter(self):
+        for filename, workbook in self.workbooks.items():
+            for sheet in workbook:
+                values = list(sheet.valuesIter())
+                batches = list(sheet.batchesIter(batchSize=2))
+                self.assertTrue(all(len(rows) <= 2
+                                    for row_nums, rows in batches))
+                self.assertEqual([(row_num, row) for row_nums, rows in batches
+                                  for row_num, row in zip(row_nums, rows)],
+                                 values)
+
+        sheet = self.workbooks['test1.xlsx'][1]
+        row_nums, columns = next(sheet.batchesIter(columnar=True, fill=''))
+        self.assertEqual(list(row_nums), [1, 2])
+        self.assertEqual(sorted(columns), ['A', 'B', 'C', 'D'])
+        self.assertEqual(columns['D'], ['', (1987, 12, 20, 0, 0, 0)])
+        batches = sheet.batchesIter(batchSize=1, width=2, reuse=True)
+        first_nums, first = next(batches)
+        self.assertEqual(first, [('лорем ипсум', '2')])
+        second_nums, second = next(batches)
+        self.assertTrue(second is first)
+        self.assertEqual(list(second_nums), [2])
+        self.assertEqual(second, [((2010, 11, 12, 0, 0, 0),
+                                   (1987, 12, 20, 0, 0, 0))])
+
+    def test_cell_slots(self):
+        cell = self.workbooks['test1.xlsx'][1]['B1']
+        self.assertFalse(hasattr(cell, '__dict__'))
+        self.assertEqual(cell.id, 'B1')
+
+    def test_column_arrays(self):
+        columns = self.workbooks['test2.xlsx'][1].columnArrays()
+        self.assertEqual(columns['A'].dtype, 'int64')
+        self.assertEqual(list(columns['A'].values)[:2],
+                         [7417187355, 7503646633])
+        self.assertFalse(any(columns['A'].mask))
+
+        columns = self.workbooks['test1.xlsx'][1].columnArrays()
+        self.assertEqual(columns['A'].dtype, 'object')
+        self.assertEqual(list(columns['A'].values),
+                         ['лорем ипсум', (2010, 11, 12, 0, 0, 0)])
+        self.assertEqual(columns['B'].dtype, 'float64')
+        self.assertEqual(list(columns['B'].values), [2.0, 32131.0])
+        self.assertEqual(columns['D'].dtype, 'datetime64[s]')
+        self.assertEqual(list(columns['D'].mask), [True, False])
+        self.assertEqual(str(columns['D'].values[1])[:10], '1987-12-20')
+
+        from xlsx.columnar import ColumnBuilder
+        builder = ColumnBuilder()
+        builder.addNumber(0, '12345678901234567', False)
+        builder.addNumber(2, '-3', False)
+        column = builder.build(3)
+        self.assertEqual(column.dtype, 'int64')
+        self.assertEqual(list(column.values), [12345678901234567, 0, -3])
+        self.assertEqual(list(column.mask), [False, True, False])
+
+        builder = ColumnBuilder()
+        for position, text in enumerate(('1.0', '1E-3', '7', '2.5')):
+            builder.addNumber(position, text, False)
+        builder.addObject(4, 'x')
+        self.assertEqual(list(builder.build(5).values),
+                         ['1.0', '1E-3', '7', '2.5', 'x'])
+
+        builder = ColumnBuilder()
+        builder.addNumber(0, '-1', True)
+        builder.addNumber(1, '32131', True)
+        column = builder.build(2)
+        self.assertEqual(column.dtype, 'datetime64[s]')
+        self.assertEqual(list(column.mask), [True, False])
+        self.assertEqual(str(column.values[1])[:10], '1987-12-20')
+
+        # Numbers formatted as text stay text
+        workbook = Workbook(self.workbooks['test2.xlsx'].filename)
+        workbook.styleKinds = array('B', [STYLE_TEXT])
+        columns = workbook[1].columnArrays()
+        self.assertEqual(columns['A'].dtype, 'object')
+        self.assertEqual(list(columns['A'].values)[:2],
+                         ['7417187355', '7503646633'])
+
+    def test_lazy_parts(self):
+        workbook = Workbook(self.workbooks['test1.xlsx'].filename)
+        self.assertEqual(len(workbook.keys()), 3)
+        for part in ('sharedStrings', 'styleSheet', 'styleKinds',
+                     'dcterms_modified'):
+            self.assertFalse(part in workbook.__dict__)
+        self.assertEqual(workbook[1]['A1'].value, 'лорем ипсум')
+        self.assertTrue('styleKinds' in workbook.__dict__)
+
+    def test_load_sheets(self):
+        for executor in ('thread', 'process'):
+            for filename, workbook in self.workbooks.items():
+                if executor == 'process' and \
+                        not isinstance(workbook.filename, six.string_types):
+                    continue
+                parallel = Workbook(workbook.filename)
+                sheets = parallel.loadSheets(workers=2, executor=executor)
+                self.assertEqual(len(sheets), len(workbook))
+                for sheet in sheets:
+                    self.assertTrue(sheet.loaded)
+                    self.assertEqual(
+                        dict((cell.id, cell.value) for cells in
+                             sheet.rows().values() for cell in cells),
+                        dict((cell.id, cell.value) for cells in
+                             workbook[sheet.id].rows().values()
+                             for cell in cells))
+
+    def test_parallel_rows_iter(self):
+        for filename, workbook in self.workbooks.items():
+            for sheet in workbook:
+                executors = ('thread', 'process') \
+                    if filename == 'test1.xlsx' else ('thread',)
+                for executor in executors:
+                    self.assertEqual(
+                        [(row_num, [(cell.id, cell.value, cell.formula)
+                                    for cell in cells])
+                         for row_num, cells in sheet.parallelRowsIter(
+                             workers=2, chunkBytes=200, executor=executor)],
+                        [(row_num, [(cell.id, cell.value, cell.formula)
+                                    for cell in cells])
+                         for row_num, cells in sheet.rowsIter()])
+
+    def test_sheet_chunks(self):
+        from xlsx.parallel import sheetChunks
+        document = (b'<?xml version="1.0"?><x:worksheet xmlns:x="urn:main">'
+                    b'<x:cols/><x:sheetData><x:row r="1"><x:c r="A1"/>'
+                    b'</x:row><x:row r="2"/><x:row\nr="3"/></x:sheetData>'
+                    b'<x:rowBreaks/></x:worksheet>')
+        chunks = list(sheetChunks(io.BytesIO(document), chunkBytes=8))
+        self.assertEqual(
+            [[row.get('r') for row in ET.fromstring(chunk)[0]]
+             for chunk in chunks],
+            [['1'], ['2'], ['3']])
+        self.assertEqual(list(sheetChunks(io.BytesIO(
+            b'<worksheet><sheetData /></worksheet>'))), [])
+
+    def test_dimension(self):
+        sheet = self.workbooks['test1.xlsx'][1]
+        self.assertEqual(sheet.dimension, 'A1:D2')
+        self.assertEqual(sheet.bounds, (1, 1, 4, 2))
+        self.assertEqual((sheet.rowCount, sheet.maxRow, sheet.maxColumn),
+                         (2, 2, 'D'))
+        self.assertFalse(sheet.loaded)
+        self.assertEqual(self.workbooks['modified_date.xlsx'][1].dimension,
+                         'B2')
+        empty = self.workbooks['test_dates.xlsx'][2]
+        self.assertEqual((empty.dimension, empty.scanDimension()),
+                         ('A1', None))
+        # A single cell dimension is not trusted on bigger sheets
+        import xlsx
+        staleSize = xlsx._STALE_DIMENSION_SIZE
+        xlsx._STALE_DIMENSION_SIZE = 100
+        try:
+            stale = Sheet(empty.workbook, empty.id, empty.name, empty.path)
+            self.assertEqual((stale.dimension, stale.rowCount,
+                              stale.maxColumn), (None, 0, None))
+        finally:
+            xlsx._STALE_DIMENSION_SIZE = staleSize
+        for workbook in self.workbooks.values():
+            for sheet in workbook:
+                cells = [cell for row_num, cells in sheet.rowsIter()
+                         for cell in cells]
+                if not cells:
+                    continue
+                first = '%s%d' % (
+                    columnLetters(min(cell.columnNumber for cell in cells)),
+                    min(cell.row for cell in cells))
+                last = '%s%d' % (
+                    columnLetters(max(cell.columnNumber for cell in cells)),
+                    max(cell.row for cell in cells))
+                self.assertEqual(sheet.scanDimension(), first
+                                 if first == last else first + ':' + last)
+
+    def test_scan_used_range(self):
+        from xlsx import _scanUsedRange
+        document = (b'<x:worksheet xmlns:x="urn:main"><x:dimension ref="A1"/>'
+                    b'<x:sheetData><x:row r="3" spans="2:3"><x:c s="1" '
+                    b'r="AA3"/><x:c\nr="b3"/></x:row><x:row r="12"/>'
+                    b'</x:sheetData></x:worksheet>')
+        self.assertEqual(_scanUsedRange(io.BytesIO(document)), (2, 3, 27, 12))
+        self.assertEqual(_scanUsedRange(io.BytesIO(
+            b'<worksheet><sheetData/></worksheet>')), None)
+
+    def test_index(self):
+        sheet = self.workbooks['test1.xlsx'][1]
+        index = sheet.index('a')
+        self.assertEqual(index, {'лорем ипсум': [1],
+                                 (2010, 11, 12, 0, 0, 0): [2]})
+        self.assertFalse(sheet.loaded)
+        self.assertTrue(sheet.index('a') is index)
+        self.assertEqual(sheet.index(['A', 'B'], normalize=six.text_type),
+                         {('лорем ипсум', '2'): [1],
+                          ('(2010, 11, 12, 0, 0, 0)',
+                           '(1987, 12, 20, 0, 0, 0)'): [2]})
+        self.assertEqual(sheet.index(('B', 'Z')),
+                         {('2', None): [1],
+                          ((1987, 12, 20, 0, 0, 0), None): [2]})
+        self.assertEqual(sheet.index('Z'), {})
+        rows = sheet.index('B', rows=True)
+        self.assertEqual([[cell.id for cell in cells]
+                          for cells in rows['2']], [['A1', 'B1', 'C1']])
+        streamed = dict((key, [[(cell.id, cell.value) for cell in cells]
+                               for cells in matches])
+                        for key, matches in rows.items())
+        sheet.rows()
+        self.assertEqual(
+            dict((key, [[(cell.id, cell.value) for cell in cells]
+                        for cells in matches])
+                 for key, matches in sheet.index('B', rows=True).items()),
+            streamed)
+        self.assertEqual(sheet.index('B', normalize=six.text_type),
+                         {'2': [1], '(1987, 12, 20, 0, 0, 0)': [2]})
+
+    def test_range_iter(self):
+        sheet = self.workbooks['test1.xlsx'][1]
+        self.assertEqual(
+            [(row_num, [cell.id for cell in cells])
+             for row_num, cells in sheet.rangeIter('B1:C2')],
+            [(1, ['B1', 'C1']), (2, ['B2', 'C2'])])
+        self.assertEqual(
+            [(row_num, [cell.id for cell in cells])
+             for row_num, cells in sheet.rangeIter(columns=('A', 'd'),
+                                                   minRow=2)],
+            [(2, ['A2', 'D2'])])
+        self.assertEqual(
+            [(row_num, [cell.id for cell in cells])
+             for row_num, cells in sheet.rangeIter('B1:C1', columns='AB')],
+            [])
+        self.assertEqual(
+            [(row_num, [cell.id for cell in cells])
+             for row_num, cells in sheet.rangeIter('B1:C1',
+                                                   columns=('A', 'B'))],
+            [(1, ['B1'])])
+        self.assertEqual(
+            [row_num for row_num, cells in sheet.rangeIter('1:1')], [1])
+        self.assertFalse(sheet.loaded)
+
+    def test_single_cell_lookup(self):
+        sheet = self.workbooks['test_dates.xlsx'][1]
+        self.assertEqual(sheet['b2'].value, (2012, 8, 13, 0, 0, 0))
+        self.assertFalse(sheet.loaded)
+        # Further lookups load the sheet instead of parsing it again
+        self.assertEqual(sheet['Z9'], None)
+        self.assertEqual(sheet['b3'].value, (1900, 3, 1, 0, 0, 0))
+        self.assertTrue(sheet.loaded)
+
+    def test_reordered_sheets(self):
+        """ Sheets are found through the workbook relationships, not by
+        their position
+        """
+        workbook = self.workbooks['reordered.xlsx']
+        self.assertEqual(workbook[1].name, '性 文化交流 例如')
+        self.assertEqual(workbook[1].path, 'xl/worksheets/sheet2.xml')
+        self.assertEqual(workbook[1]['A1'].value, '性 文化交流 例如')
+        self.assertEqual(workbook['рускии']['A1'].value, 'лорем ипсум')
+
+    def test_sheet_store(self):
+        """ Loaded sheets answer cell, row and column lookups alike """
+        sheet = self.workbooks['test1.xlsx'][1]
+        rows = sheet.rows()
+        self.assertEqual(sorted(rows), [1, 2])
+        self.assertTrue(2 in rows)
+        self.assertFalse(3 in rows)
+        self.assertEqual(list(sheet.cols()), ['A', 'B', 'C', 'D'])
+        self.assertEqual([cell.id for cell in sheet.cols()['D']], ['D2'])
+        self.assertEqual([cell.id for cell in sheet['2']],
+                         ['A2', 'B2', 'C2', 'D2'])
+        self.assertEqual(sheet['C2'].value, (1987, 12, 20, 0, 0, 0))
+        self.assertEqual([cell.id for cell in sheet[2]],
+                         ['A2', 'B2', 'C2', 'D2'])
+        self.assertEqual([cell.id for cell in sheet.cols()[4]], ['D2'])
+        self.assertEqual(sheet['D1'], None)
+        self.assertEqual(list(sheet),
+                         ['A1', 'B1', 'C1', 'A2', 'B2', 'C2', 'D2'])
+
     def test_dcterms_modified(self):
         self.assertTrue(self.workbooks['test1.xlsx'].dcterms_modified is None)
         self.assertEqual(self.workbooks['modified_date.xlsx'].dcterms_modified,
@@ -97,6 +409,104 @@ class WorkbookTestCase(unittest.TestCase):
         self.assertEqual(workbook[1]['B4'].value, (2200, 12, 31, 0, 0, 0))
         self.assertEqual(workbook[1]['B5'].value, (2012, 8, 13, 12, 11, 0))
 
+    def test_style_kinds(self):
+        workbook = self.workbooks['test_dates.xlsx']
+        self.assertEqual(list(workbook.styleKinds),
+                         [STYLE_NUMBER, STYLE_DATE, STYLE_DATE, STYLE_DATE,
+                          STYLE_DATE])
+
+    def test_typed_values(self):
+        path = os.path.join(os.path.dirname(__file__), 'fixtures',
+                            'test1.xlsx')
+        workbook = Workbook(path, typedValues=True)
+        rows = dict(workbook[1].rowsIter())
+        self.assertEqual([cell.value for cell in rows[1]],
+                         ['лорем ипсум', 2, 'лорем ипсум2'])
+        self.assertTrue(isinstance(rows[1][1].value, int))
+        self.assertEqual(rows[2][0].value, datetime.datetime(2010, 11, 12))
+        self.assertEqual(workbook[1]['B2'].value,
+                         datetime.datetime(1987, 12, 20))
+        loaded = Workbook(path, typedValues=True)
+        sheet = loaded.loadSheets([1], executor='process')[0]
+        self.assertEqual(sheet['B1'].value, 2)
+        self.assertTrue(isinstance(sheet['B1'].value, int))
+
+        store = SheetStore(Cell, columnIndex, columnLetters, True)
+        store.addRow(1, [('A', 1, None), ('B', True, None), ('C', 1.0, None)])
+        self.assertEqual([type(cell.value) for cell in store.rowCells(0)],
+                         [int, bool, float])
+
+        decode = Sheet._typedCellValue
+        for xml, value in (
+                ('<c r="A1"><v>12</v></c>', 12),
+                ('<c r="A1" t="n"><v>-3.5</v></c>', -3.5),
+                ('<c r="A1"><v>1.5E+20</v></c>', 1.5e20),
+                ('<c r="A1"><v>12345678901234567</v></c>', 1.2345678901234568e16),
+                ('<c r="A1" t="b"><v>1</v></c>', True),
+                ('<c r="A1" t="b"><v>0</v></c>', False),
+                ('<c r="A1" t="e"><v>#DIV/0!</v></c>', '#DIV/0!'),
+                ('<c r="A1" t="str"><f>A2</f><v>text</v></c>', 'text'),
+                ('<c r="A1" s="1"/>', None),
+                ('<c r="A1" s="1"><v>-1</v></c>', -1),
+                ('<c r="A1" s="2"><v>12</v></c>', '12'),
+                ('<c r="A1" s="1"><v>3000000.5</v></c>', 3000000.5)):
+            node = ET.fromstring(xml.replace(
+                '<c ', '<c xmlns="http://schemas.openxmlformats.org/'
+                'spreadsheetml/2006/main" '))
+            decoded = decode(node, None,
+                             [STYLE_NUMBER, STYLE_DATE, STYLE_TEXT])
+            self.assertEqual(decoded, value)
+            if not isinstance(value, six.string_types):
+                self.assertEqual(type(decoded), type(value))
+        self.assertTrue(isinstance(decode(ET.fromstring(
+            '<c xmlns="http://schemas.openxmlformats.org/spreadsheetml/'
+            '2006/main" t="e"><v>#N/A</v></c>'), None, []), ErrorValue))
+
+    def test_shared_strings_parse(self):
+        """ The streaming decoder must match the dom conversion """
+        for filename, workbook in self.workbooks.items():
+            if 'xl/sharedStrings.xml' not in workbook.domzip:
+                continue
+            dom = SharedStrings(workbook.domzip['xl/sharedStrings.xml'])
+            parsed = SharedStrings.parse(
+                workbook.domzip.open('xl/sharedStrings.xml'))
+            self.assertEqual(parsed, dom)
+
+        document = (
+            '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/'
+            '2006/main" uniqueCount="9"><si><t>abc</t></si><si><t/></si>'
+            '<si><t xml:space="preserve"> a&amp;b </t></si>'
+            '<si><r><rPr><b/></rPr><t>a</t></r><r><t>b</t></r>'
+            '<phoneticPr fontId="1"/></si><si><r><t></t></r></si>'
+            '<si><t>x</t><rPh sb="0" eb="1"><t>y</t></rPh></si></sst>')
+        parsed = SharedStrings.parse(io.BytesIO(document.encode('utf-8')))
+        self.assertEqual(parsed, ['abc', None, ' a&b ', 'ab', None, 'x'])
+        self.assertEqual(parsed, SharedStrings(ET.fromstring(document)))
+
+        document = document.replace('uniqueCount="9"',
+                                    'uniqueCount="999999999999"')
+        parsed = SharedStrings.parse(io.BytesIO(document.encode('utf-8')),
+                                     len(document))
+        self.assertEqual(parsed, ['abc', None, ' a&b ', 'ab', None, 'x'])
+
+
+class AddressTestCase(unittest.TestCase):
+
+    def test_column_conversion(self):
+        for letters, index in (('A', 1), ('Z', 26), ('AA', 27), ('AZ', 52),
+                               ('ZZ', 702), ('AAA', 703), ('XFD', 16384)):
+            self.assertEqual(columnIndex(letters), index)
+            self.assertEqual(columnLetters(index), letters)
+
+    def test_cell_ordering(self):
+        cells = [Cell(1, 'AA', None), Cell(10, 'B', None),
+                 Cell(2, 'B', None), Cell(1, 'Z', None)]
+        self.assertEqual([cell.id for cell in sorted(cells)],
+                         ['B2', 'B10', 'Z1', 'AA1'])
+        self.assertTrue(Cell(2, 'B', None) < Cell(10, 'B', None))
+        self.assertTrue(Cell(1, 'B', 1) == Cell(1, 'B', 2))
+        self.assertEqual(Cell(1, 'AA', None).columnNumber, 27)
+
 
 class FileHandleWorkbookTestCase(WorkbookTestCase):
     """
@@ -115,5 +525,74 @@ class FileHandleWorkbookTestCase(WorkbookTestCase):
             self.workbooks[filename] = Workbook(open(filepath, 'rb'))
 
 
+class BufferWorkbookTestCase(WorkbookTestCase):
+    """
+    Run all the same tests in WorkbookTestCase, but reading the workbooks
+    from memory: bytes, memoryviews and memory mapped files.
+    """
+
+    def setUp(self):
+        """ Getting all file from fixtures dir """
+        self.workbooks = {}
+        fixtures_dir = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                    'fixtures'))
+        xlsx_files = sorted(os.listdir(fixtures_dir))
+        for index, filename in enumerate(xlsx_files):
+            filepath = os.path.join(fixtures_dir, filename)
+            if index % 3 == 2:
+                self.workbooks[filename] = Workbook(filepath, memoryMap=True)
+                continue
+            with open(filepath, 'rb') as handle:
+                data = handle.read()
+            if index % 3 == 1:
+                data = memoryview(bytearray(data))
+            self.workbooks[filename] = Workbook(data)
+
+
+class LazySharedStringsWorkbookTestCase(WorkbookTestCase):
+    """
+    Run all the same tests in WorkbookTestCase, but decoding shared strings
+    on demand through a tiny cache.
+    """
+
+    def setUp(self):
+        """ Getting all file from fixtures dir """
+        self.workbooks = {}
+        fixtures_dir = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                    'fixtures'))
+        xlsx_files = os.listdir(fixtures_dir)
+        for filename in xlsx_files:
+            self.workbooks[filename] = Workbook(
+                os.path.join(fixtures_dir, filename), lazySharedStrings=True,
+                sharedStringsCacheSize=2, internStrings=True)
+
+    def test_shared_strings_match(self):
+        for filename, workbook in self.workbooks.items():
+            if workbook.sharedStrings is None:
+                continue
+            eager = Workbook(workbook.filename).sharedStrings
+            self.assertEqual(list(workbook.sharedStrings), list(eager))
+
+    def test_bom_and_intern(self):
+        data = (codecs.BOM_UTF8 + b'<?xml version="1.0"?><sst xmlns="'
+                b'http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b'<si><t>same text</t></si><si><t>same text</t></si></sst>')
+        strings = LazySharedStrings(data, cacheSize=0, intern=True)
+        self.assertEqual(list(strings), ['same text', 'same text'])
+        self.assertTrue(strings[0] is strings[1])
+
+
+class StreamingWorkbookTestCase(WorkbookTestCase):
+    """
+    Run all the same tests in WorkbookTestCase, but streaming every sheet
+    instead of parsing small ones in one go.
+    """
+
+    def setUp(self):
+        super(StreamingWorkbookTestCase, self).setUp()
+        for workbook in self.workbooks.values():
+            workbook.domzip.inMemoryLimit = 0
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+
+from xlsx import Workbook
+from xlsx.cache import WorkbookCache
+
+
+def sheet_contents(workbook):
+    return [(sheet.name,
+             sorted((row_num, [(cell.id, cell.value, cell.formula)
+                               for cell in cells])
+                    for row_num, cells in sheet.rows().items()),
+             sorted(sheet.cols()))
+            for sheet in workbook]
+
+
+class WorkbookCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.fixtures_dir = os.path.abspath(
+            os.path.join(os.path.dirname(__file__), 'fixtures'))
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_warm_cache(self):
+        for hash_contents in (False, True):
+            cache = WorkbookCache(self.cache_dir, hashContents=hash_contents)
+            for filename in os.listdir(self.fixtures_dir):
+                path = os.path.join(self.fixtures_dir, filename)
+                cold = sheet_contents(Workbook(path, cache=cache))
+                warm = Workbook(path, cache=cache)
+                self.assertEqual(sheet_contents(warm), cold)
+                self.assertEqual(sheet_contents(warm), sheet_contents(
+                    Workbook(path)))
+
+    def test_skips_parsing(self):
+        cache = WorkbookCache(self.cache_dir)
+        path = os.path.join(self.fixtures_dir, 'test1.xlsx')
+        Workbook(path, cache=cache)[1].rows()
+        warm = Workbook(path, cache=cache)
+        warm.domzip = None # Any read from the zip file would fail
+        self.assertEqual(warm[1]['A1'].value, 'лорем ипсум')
+        self.assertEqual(warm[1]['A2'].value, (2010, 11, 12, 0, 0, 0))
+
+    def test_typed_values(self):
+        cache = WorkbookCache(self.cache_dir)
+        for filename in os.listdir(self.fixtures_dir):
+            path = os.path.join(self.fixtures_dir, filename)
+            Workbook(path, cache=cache)[1].rows()
+            cold = sheet_contents(Workbook(path, typedValues=True,
+                                           cache=cache))
+            warm = sheet_contents(Workbook(path, typedValues=True,
+                                           cache=cache))
+            self.assertEqual(warm, cold)
+            self.assertEqual([[type(value) for row in rows
+                               for id, value, formula in row[1]]
+                              for name, rows, cols in warm],
+                             [[type(value) for row in rows
+                               for id, value, formula in row[1]]
+                              for name, rows, cols in cold])
+        self.assertEqual(sheet_contents(Workbook(path, cache=cache)),
+                         sheet_contents(Workbook(path)))
+
+    def test_load_sheets(self):
+        cache = WorkbookCache(self.cache_dir)
+        path = os.path.join(self.fixtures_dir, 'test1.xlsx')
+        Workbook(path, cache=cache).loadSheets(executor='process')
+        entry, = os.listdir(self.cache_dir)
+        self.assertEqual(len([name for name in os.listdir(
+            os.path.join(self.cache_dir, entry))
+            if name.startswith('sheet-')]), 3)
+        warm = Workbook(path, cache=cache)
+        warm.sharedStrings # Memory mapped from the cache
+        os.remove(os.path.join(self.cache_dir, entry, sorted(
+            name for name in os.listdir(os.path.join(self.cache_dir, entry))
+            if name.startswith('sheet-'))[0]))
+        warm.loadSheets(executor='process')
+        self.assertEqual(sheet_contents(warm), sheet_contents(Workbook(path)))
+
+    def test_eviction(self):
+        cache = WorkbookCache(self.cache_dir, maxBytes=1)
+        for filename in ('test1.xlsx', 'test_dates.xlsx'):
+            Workbook(os.path.join(self.fixtures_dir, filename),
+                     cache=cache)[1].rows()
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
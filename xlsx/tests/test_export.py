@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import io
+import os
+import gzip
+import json
+import shutil
+import tempfile
+import unittest
+
+from xlsx import Workbook
+from xlsx.export import exportSheet, exportWorkbook, formatDate
+
+
+class ExportTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(os.path.dirname(__file__), 'fixtures',
+                                 'test1.xlsx')
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_csv(self):
+        output = io.StringIO()
+        rows = exportSheet(Workbook(self.path)[2], output, fill='-')
+        self.assertEqual(rows, 2)
+        self.assertEqual(output.getvalue().splitlines()[0],
+                         '性 文化交流 例如,用汉字的个体差异不到％ 台,-,'
+                         'this is chineese')
+
+    def test_ndjson(self):
+        output = io.StringIO()
+        exportSheet(Workbook(self.path, typedValues=True)[1], output,
+                    format='ndjson', batchSize=1)
+        self.assertEqual([json.loads(line) for line in
+                          output.getvalue().splitlines()],
+                         [['лорем ипсум', 2, 'лорем ипсум2'],
+                          ['2010-11-12', '1987-12-20', '1987-12-20',
+                           '1987-12-20']])
+
+    def test_workbook(self):
+        for workers in (None, 2):
+            paths = exportWorkbook(self.path, self.directory,
+                                   compression='gzip', workers=workers)
+            self.assertEqual(len(paths), 3)
+            with gzip.open(paths[0], 'rb') as handle:
+                self.assertEqual(handle.read().decode('utf-8'),
+                                 'лорем ипсум,2,лорем ипсум2\n'
+                                 '2010-11-12,1987-12-20,1987-12-20,'
+                                 '1987-12-20\n')
+
+    def test_format_date(self):
+        self.assertEqual(formatDate((2012, 8, 13, 12, 11, 0)),
+                         '2012-08-13 12:11:00')
+        self.assertEqual(formatDate((0, 0, 0, 6, 30, 0)), '06:30:00')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import os
+import unittest
+
+from xlsx import Workbook, DomZip
+from xlsx.stats import Stats, PHASE_PARSE, PHASE_SHARED_STRINGS, \
+    PHASE_ROWS, PHASE_LOAD
+
+
+class StatsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(os.path.dirname(__file__), 'fixtures',
+                                 'test1.xlsx')
+
+    def test_counters(self):
+        workbook = Workbook(self.path, stats=True)
+        cells = 0
+        for sheet in workbook:
+            for rowNum, row in sheet.rowsIter():
+                cells += len(row)
+        stats = workbook.stats
+        self.assertEqual(stats.cells, cells)
+        self.assertEqual(stats.rows, 7)
+        # Row 2 of the first sheet holds 4 dates
+        self.assertEqual(workbook[1].stats.dateConversions, 4)
+        self.assertEqual(workbook[1].stats.sharedStringHits, 2)
+        self.assertEqual(stats.sharedStringHits,
+                         sum(sheet.stats.sharedStringHits
+                             for sheet in workbook))
+        domzip = DomZip(self.path)
+        self.assertEqual(stats.bytesInflated,
+                         sum(domzip.size(key) for key in
+                             ('xl/workbook.xml', 'xl/_rels/workbook.xml.rels',
+                              'xl/sharedStrings.xml', 'xl/styles.xml') +
+                             tuple(sheet.path for sheet in workbook)))
+        self.assertEqual(stats.phaseCalls[PHASE_ROWS], 3)
+        self.assertEqual(stats.phaseCalls[PHASE_SHARED_STRINGS], 1)
+        self.assertTrue(stats.parseSeconds > 0)
+
+    def test_callback(self):
+        phases = []
+        stats = Stats(callback=lambda stats, phase, seconds:
+                      phases.append((stats.name, phase)))
+        workbook = Workbook(self.path, stats=stats)
+        workbook[1].rows()
+        workbook[1].valuesIter()
+        self.assertEqual(phases, [
+            (None, PHASE_PARSE), (None, PHASE_PARSE),
+            (None, PHASE_SHARED_STRINGS), (None, PHASE_PARSE),
+            (workbook[1].name, PHASE_ROWS), (workbook[1].name, PHASE_LOAD)])
+        self.assertEqual(stats.asDict()['rows'], 2)
+
+    def test_off(self):
+        workbook = Workbook(self.path)
+        self.assertEqual(workbook.stats, None)
+        self.assertEqual(workbook[1].stats, None)
+        self.assertEqual(workbook.domzip.stats, None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+import datetime
+import unittest
+
+from xlsx import xldate
+from xlsx.xldate import xldate_as_tuple, xldates_as_datetimes, \
+    XLDateNegative, XLDateAmbiguous, XLDateTooLarge
+
+
+def as_datetime(value):
+    """ Turn a datetime or datetime64 value into a datetime """
+    if value is None or isinstance(value, datetime.datetime):
+        return value
+    if str(value) == 'NaT':
+        return None
+    return datetime.datetime.strptime(str(value), '%Y-%m-%dT%H:%M:%S')
+
+
+class XLDatesTestCase(unittest.TestCase):
+
+    xldates = [61, 1000.5, 40000.25, 41134.5078, 73050.99999, 2957000.2]
+
+    def convert(self, *args, **kwargs):
+        return [as_datetime(value)
+                for value in xldates_as_datetimes(*args, **kwargs)]
+
+    def test_matches_tuples(self):
+        for datemode in (0, 1):
+            for xl, value in zip(self.xldates,
+                                 self.convert(self.xldates, datemode)):
+                self.assertEqual(value.timetuple()[:6],
+                                 xldate_as_tuple(xl, datemode))
+
+    def test_errors(self):
+        for xl, error in ((-1, XLDateNegative), (5, XLDateAmbiguous),
+                          (2958466, XLDateTooLarge)):
+            self.assertRaises(error, xldates_as_datetimes, [61, xl], 0)
+            self.assertEqual(self.convert([61, xl], 0, errors='mask')[1],
+                             None)
+
+    def test_without_numpy(self):
+        numpy, xldate.numpy = xldate.numpy, None
+        try:
+            self.test_matches_tuples()
+            self.test_errors()
+        finally:
+            xldate.numpy = numpy
+
+
+if __name__ == '__main__':
+    unittest.main()
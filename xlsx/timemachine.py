@@ -3,8 +3,28 @@
 Compatibility shims for different Python versions.
 """
 
+import mmap
 import sys
 
+# Text, paths and in-memory workbook contents. zipfile does not take bytes paths
+# on Python 3, so bytes there are contents.
+if sys.version_info[0] >= 3: # Python 3
+    string_types = (str, )
+    text_type = str
+    buffer_types = (bytes, bytearray, memoryview, mmap.mmap)
+else:  # Python 2
+    string_types = (basestring, )
+    text_type = unicode
+    buffer_types = (bytearray, memoryview, mmap.mmap)
+
+# Let equal strings share one object. intern() only takes byte strings on
+# Python 2, where ElementTree gives those for ASCII text.
+if sys.version_info[0] >= 3: # Python 3
+    intern_text = sys.intern
+else:  # Python 2
+    def intern_text(text):
+        return intern(text) if isinstance(text, str) else text
+
 
 def int_floor_div(x, y):
     return divmod(x, y)[0]
@@ -18,9 +38,27 @@ class UnicodeMixin(object):
     Define a __unicode__ method that returns unicode on the target class, and
     this mixin will add the proper __str__ method.
     """
+    __slots__ = ()
+
     if sys.version_info[0] >= 3: # Python 3
         def __str__(self):
             return self.__unicode__()
     else:  # Python 2
         def __str__(self):
             return self.__unicode__().encode('utf8')
+
+
+class cached_property(object):
+    """
+    Decorator for a property computed on first access and then stored on the
+    instance, like functools.cached_property on Python 3.8+.
+    """
+    def __init__(self, func):
+        self.func = func
+        self.__doc__ = func.__doc__
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = instance.__dict__[self.func.__name__] = self.func(instance)
+        return value
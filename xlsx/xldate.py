@@ -18,8 +18,15 @@
 #    Noon on Gregorian 1900-03-01 (day 61 in the 1900-based system) is JDN 2415080.0
 #    Noon on Gregorian 1904-01-02 (day  1 in the 1904-based system) is JDN 2416482.0
 
+import datetime
+
 from xlsx.timemachine import int_floor_div as ifd
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 _JDN_delta = (2415080 - 61, 2416482 - 1)
 assert _JDN_delta[1] - _JDN_delta[0] == 1462
 
@@ -92,6 +99,117 @@ def xldate_as_tuple(xldate, datemode):
     else:
         return (ifd(yreg, 1461) - 4716, mp + 3, d, hour, minute, second)
 
+##
+# Convert an Excel number (presumed to represent a date, a datetime or a time) into
+# whole seconds since 1970-01-01T00:00:00, e.g. for building datetime64 values.
+# Seconds are rounded and range-checked exactly as in xldate_as_tuple.
+# @param xldate The Excel number
+# @param datemode 0: 1900-based, 1: 1904-based.
+# @return Seconds since the Unix epoch.
+# <br>Special case: if 0.0 <= xldate < 1.0, it is a time on day zero of the
+# datemode (1899-12-30 for datemode 0, 1904-01-01 for datemode 1).
+# @throws XLDateNegative xldate < 0.00
+# @throws XLDateAmbiguous The 1900 leap-year problem (datemode == 0 and 1.0 <= xldate < 61.0)
+# @throws XLDateTooLarge Gregorian year 10000 or later
+# @throws XLDateBadDatemode datemode arg is neither 0 nor 1
+
+_JDN_UNIX_EPOCH = 2440588
+_UNIX_EPOCH = datetime.datetime(1970, 1, 1)
+
+def xldate_as_unix(xldate, datemode):
+    if datemode not in (0, 1):
+        raise XLDateBadDatemode(datemode)
+    if xldate < 0.00:
+        raise XLDateNegative(xldate)
+    xldays = int(xldate)
+    seconds = int(round((xldate - xldays) * 86400.0))
+    if seconds == 86400:
+        seconds = 0
+        xldays += 1
+    if xldays >= _XLDAYS_TOO_LARGE[datemode]:
+        raise XLDateTooLarge(xldate)
+    if 1 <= xldays < 61 and datemode == 0:
+        raise XLDateAmbiguous(xldate)
+    return (xldays + _JDN_delta[datemode] - _JDN_UNIX_EPOCH) * 86400 + seconds
+
+##
+# Convert an Excel number (presumed to represent a date, a datetime or a time) into
+# a datetime object, using the same conversion as xldate_as_unix.
+# @param xldate The Excel number
+# @param datemode 0: 1900-based, 1: 1904-based.
+# @return datetime.datetime, to the nearest second.
+# <br>Special case: if 0.0 <= xldate < 1.0, it is a time on day zero of the
+# datemode (1899-12-30 for datemode 0, 1904-01-01 for datemode 1).
+# @throws XLDateError Same as xldate_as_unix
+
+def xldate_as_datetime(xldate, datemode):
+    return _UNIX_EPOCH + datetime.timedelta(
+        seconds=xldate_as_unix(xldate, datemode))
+
+##
+# Convert a sequence of Excel numbers in one call, using the same conversion as
+# xldate_as_unix.
+# @param xldates Sequence or array of Excel numbers
+# @param datemode 0: 1900-based, 1: 1904-based.
+# @param errors 'raise' to raise the error of the first invalid number, or 'mask'
+# to return NaT (None without NumPy) in its place.
+# @return A datetime64[s] array when NumPy is installed, else a list of datetime objects.
+# @throws XLDateNegative xldate < 0.00
+# @throws XLDateAmbiguous The 1900 leap-year problem (datemode == 0 and 1.0 <= xldate < 61.0)
+# @throws XLDateTooLarge Gregorian year 10000 or later
+# @throws XLDateBadDatemode datemode arg is neither 0 nor 1
+# @throws XLDateError A number that is not a number (NaN)
+
+def xldates_as_datetimes(xldates, datemode, errors='raise'):
+    if datemode not in (0, 1):
+        raise XLDateBadDatemode(datemode)
+    if errors not in ('raise', 'mask'):
+        raise ValueError("errors must be 'raise' or 'mask': %r" % (errors,))
+    if numpy is None:
+        return _xldates_as_datetime_list(xldates, datemode, errors)
+
+    xldates = numpy.asarray(xldates, dtype='float64')
+    xldays = numpy.trunc(xldates)
+    seconds = numpy.round((xldates - xldays) * 86400.0)
+    carry = seconds == 86400
+    xldays[carry] += 1
+    seconds[carry] = 0
+    invalid = ~(xldates >= 0.0) | (xldays >= _XLDAYS_TOO_LARGE[datemode])
+    if datemode == 0:
+        invalid |= (xldays >= 1) & (xldays < 61)
+    if errors == 'raise' and invalid.any():
+        xldate = xldates[numpy.argmax(invalid)]
+        if xldate != xldate:
+            raise XLDateError(xldate)
+        xldate_as_unix(float(xldate), datemode)
+
+    xldays[invalid] = 0
+    seconds[invalid] = 0
+    unix = (xldays.astype('int64') + (_JDN_delta[datemode] - _JDN_UNIX_EPOCH)) \
+        * 86400 + seconds.astype('int64')
+    result = unix.astype('datetime64[s]')
+    result[invalid] = numpy.datetime64('NaT')
+    return result
+
+def _xldates_as_datetime_list(xldates, datemode, errors):
+    epoch = _UNIX_EPOCH
+    delta = datetime.timedelta
+    result = []
+    append = result.append
+    for xldate in xldates:
+        if xldate != xldate:
+            if errors == 'raise':
+                raise XLDateError(xldate)
+            append(None)
+            continue
+        try:
+            append(epoch + delta(seconds=xldate_as_unix(xldate, datemode)))
+        except XLDateError:
+            if errors == 'raise':
+                raise
+            append(None)
+    return result
+
 # === conversions from date/time to xl numbers
 
 def _leap(y):